@@ -0,0 +1,98 @@
+"""
+Server-side AI opponent
+
+Bot moves are computed on a small, fixed pool of worker threads instead of
+on the connection threads, so a busy bot never holds up network I/O. Each
+request carries a time budget: a request that has already waited past its
+deadline in the queue is answered with a quick fallback move instead of a
+search.
+
+With deepening=True moves come from an iterative deepening search that
+stops at the deadline, so every answer arrives within the budget however
+deep the full search would be. The desktop clients use a one-thread
+service this way to keep minimax off the render loop.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tictactoe as ttt
+
+
+class MoveRequest:
+    """A pending move; cancel() stops its search and drops its callback"""
+
+    def __init__(self, board, deadline, callback):
+        self.board = board
+        self.deadline = deadline
+        self.callback = callback
+        self.cancelled = threading.Event()
+        self.action = None
+        self.depth = None  # Depth the deepening search finished
+        self.done = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class AIService:
+    def __init__(self, workers=4, max_games=5000, budget=0.5, engine=ttt.minimax, deepening=False):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai")
+        self.max_games = max_games  # Bounds the queue: each game has at most one pending move
+        self.budget = budget        # Seconds from request to answer
+        self.engine = engine
+        self.deepening = deepening  # Use ttt.deepening_search with the deadline instead of engine
+        self.games = 0
+        self.moves = 0
+        self.fallbacks = 0
+        self.lock = threading.Lock()
+
+    def open_game(self):
+        """Reserve a slot for a new AI game; returns False when the service is full"""
+        with self.lock:
+            if self.games >= self.max_games:
+                return False
+            self.games += 1
+            return True
+
+    def close_game(self):
+        with self.lock:
+            self.games -= 1
+
+    def request_move(self, board, callback, budget=None):
+        """
+        Compute a move for the player to move on board in the pool and call
+        callback(action) from the worker thread. Returns the MoveRequest.
+        """
+        deadline = time.monotonic() + (self.budget if budget is None else budget)
+        request = MoveRequest(board, deadline, callback)
+        self.executor.submit(self._compute, request)
+        return request
+
+    def _compute(self, request):
+        board, deadline = request.board, request.deadline
+        try:
+            if request.cancelled.is_set():
+                return
+            if self.deepening:
+                _, action, request.depth = ttt.deepening_search(board, deadline, request.cancelled)
+            elif time.monotonic() >= deadline:
+                # Out of time before starting; any legal move beats no move
+                action = ttt.ordered_actions(board)[0]
+                with self.lock:
+                    self.fallbacks += 1
+            else:
+                action = self.engine(board)
+            if request.cancelled.is_set():
+                return
+            with self.lock:
+                self.moves += 1
+            request.action = action
+            request.done.set()
+            request.callback(action)
+        except Exception as e:
+            print(f"[AI] Error computing move: {e}")
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
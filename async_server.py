@@ -0,0 +1,360 @@
+"""
+Asyncio TicTacToe server
+
+Single-process alternative to the thread-per-connection TicTacToeServer in
+server.py. Every client is a coroutine on one event loop, so an idle lobby
+connection costs a socket and a coroutine instead of an OS thread and its
+stack. It speaks the same new / join:<id> / quick_match / watch:<id> /
+move:i,j protocol.
+"""
+
+import asyncio
+import itertools
+import json
+
+import protocol
+import tictactoe as ttt
+from matchmaking import MatchQueue
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def raise_fd_limit():
+    """
+    Raise the soft open-file limit to the hard limit so the process can hold
+    tens of thousands of sockets. Returns the new soft limit (or None when
+    the platform has no such limit).
+    """
+    if resource is None:
+        return None
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        target = hard if hard != resource.RLIM_INFINITY else 1 << 20
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        except (ValueError, OSError):
+            pass
+    return soft
+
+
+class AsyncTicTacToeServer:
+    def __init__(self, host='192.168.22.71', port=8000, backlog=4096):
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.games = {}  # Dictionary to store game states: {game_id: (state, player1_writer, player2_writer)}
+        self.game_ids = itertools.count(1)
+        self.matches = MatchQueue(bucket_width=100)  # IDs of games waiting for a quick_match opponent
+        self.spectators = {}  # game_id -> writers of watch:<id> connections
+        self.spectator_buffer = 16 * 1024  # Spectators with more unsent bytes than this are dropped
+        self.connections = 0
+        self.writers = set()  # Every open connection, for metrics
+        self.player_buffer = 32 * 1024  # Unsent bytes before a slow player is disconnected
+        self.players_disconnected = 0
+        self.spectators_dropped = 0
+
+    def start(self):
+        """Run the event loop until interrupted"""
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            print("[SERVER] Shutting down server...")
+        finally:
+            self.cleanup()
+
+    async def serve(self):
+        limit = raise_fd_limit()
+        server = await asyncio.start_server(self.handle_client, self.host, self.port,
+                                            backlog=self.backlog, reuse_address=True)
+        print(f"[SERVER] Started on {self.host}:{self.port} (asyncio, fd limit {limit})")
+        print(f"[SERVER] Waiting for connections...")
+        async with server:
+            await server.serve_forever()
+
+    def cleanup(self):
+        print("[SERVER] Cleaning up resources...")
+        for game_id, (_, p1, p2) in self.games.items():
+            for writer in (p1, p2):
+                if writer:
+                    writer.close()
+        self.games.clear()
+        print("[SERVER] Server shutdown complete")
+
+    async def handle_client(self, reader, writer):
+        """Handle a client connection by either creating a new game or joining an existing one"""
+        address = writer.get_extra_info('peername')
+        game_id = None
+        self.connections += 1
+        self.writers.add(writer)
+        try:
+            # First message should be either 'new', 'quick_match', 'join' or 'watch'
+            frame = await protocol.read_frame(reader)
+            if frame is None:
+                return
+            _, data = frame
+            request = data.decode('utf-8')
+
+            # Exactly 'new': new_ai is not served here and gets error:invalid_request
+            if request == 'new':
+                game_id = self.create_new_game(writer)
+                print(f"[GAME] New game created: Game ID {game_id} by {address}")
+                writer.write(protocol.encode_text(f"new_game:{game_id}"))
+                await writer.drain()
+                print(f"[GAME:{game_id}] Waiting for opponent to join...")
+
+            elif request.startswith('quick_match'):
+                _, _, rating = request.partition(':')
+                if rating and not rating.isdigit():
+                    print(f"[ERROR] Invalid rating from {address}: {rating}")
+                    writer.write(protocol.encode_text("error:invalid_request"))
+                    return
+                game_id = self.quick_match(writer, int(rating) if rating else None)
+                await writer.drain()
+                print(f"[MATCH] Player {address} matched into game {game_id}")
+
+            elif request.startswith('watch'):
+                _, watch_id = request.split(':')
+                await self.watch_game(reader, writer, watch_id, address)
+                return
+
+            elif request == 'stats':
+                writer.write(protocol.encode_text("stats:" + json.dumps(self.metrics())))
+                await writer.drain()
+                return
+
+            elif request.startswith('join'):
+                _, game_id = request.split(':')
+                if self.join_game(writer, game_id):
+                    print(f"[GAME:{game_id}] Player {address} joined")
+                    writer.write(protocol.encode_text(f"joined:{game_id}"))
+                    await writer.drain()
+                    print(f"[GAME:{game_id}] Game is ready to start")
+                else:
+                    print(f"[ERROR] Failed to join game {game_id} - game not found or full")
+                    writer.write(protocol.encode_text("error:game_not_found"))
+                    return
+            else:
+                print(f"[ERROR] Unknown request from {address}: {request}")
+                writer.write(protocol.encode_text("error:invalid_request"))
+                return
+
+            await self.handle_game_moves(reader, writer, game_id, address)
+
+        except Exception as e:
+            print(f"[ERROR] Error handling client {address}: {e}")
+        finally:
+            self.connections -= 1
+            self.writers.discard(writer)
+            print(f"[CONNECTION] Client {address} disconnected")
+            writer.close()
+
+    def create_new_game(self, writer):
+        """Create a new game and return its ID"""
+        game_id = str(next(self.game_ids))
+        self.games[game_id] = (ttt.GameState(), writer, None)
+        return game_id
+
+    def quick_match(self, writer, rating=None):
+        """Pair with the longest-waiting player in the rating bucket, or queue a new game; returns its ID"""
+        game_id = str(next(self.game_ids))
+        match = self.matches.match(game_id, rating, alive=self.is_open)
+        if match is None:
+            self.games[game_id] = (ttt.GameState(), writer, None)
+            writer.write(protocol.encode_text(f"new_game:{game_id}"))
+            return game_id
+        game_id, waited = match
+        self.join_game(writer, game_id)
+        writer.write(protocol.encode_text(f"joined:{game_id}"))
+        self.matches.record(waited)
+        print(f"[MATCH] Game {game_id} paired after {waited * 1000:.1f} ms in queue")
+        return game_id
+
+    def is_open(self, game_id):
+        """True if the game exists and is still waiting for player 2"""
+        game = self.games.get(game_id)
+        return game is not None and game[2] is None
+
+    def join_game(self, writer, game_id):
+        """Join an existing game if it exists and is not full"""
+        if game_id in self.games and self.games[game_id][2] is None:
+            state, player1, _ = self.games[game_id]
+            self.games[game_id] = (state, player1, writer)
+            self.send(player1, protocol.encode_text("opponent_joined"))
+            return True
+        return False
+
+    async def watch_game(self, reader, writer, game_id, address):
+        """Stream a game's moves to a spectator until the game or the connection ends"""
+        if game_id not in self.games:
+            writer.write(protocol.encode_text("error:game_not_found"))
+            return
+        state = self.games[game_id][0]
+        writer.write(protocol.encode_text(f"watching:{game_id}") +
+                     protocol.encode_frame(protocol.MSG_BOARD, protocol.encode_board(state.to_board())))
+        watchers = self.spectators.setdefault(game_id, [])
+        watchers.append(writer)
+        print(f"[GAME:{game_id}] Spectator {address} watching ({len(watchers)} total)")
+
+        # Spectators send nothing; wait for them to leave or for the game to close them
+        try:
+            while await protocol.read_frame(reader) is not None:
+                pass
+        except (OSError, asyncio.IncompleteReadError):
+            pass
+        watchers = self.spectators.get(game_id)
+        if watchers and writer in watchers:
+            watchers.remove(writer)
+
+    def broadcast(self, game_id, data):
+        """Buffer data for every spectator of a game, dropping those that cannot keep up"""
+        watchers = self.spectators.get(game_id)
+        if not watchers:
+            return
+        keep = []
+        for writer in watchers:
+            if writer.transport.get_write_buffer_size() + len(data) > self.spectator_buffer:
+                print(f"[BACKPRESSURE] Dropped slow spectator {writer.get_extra_info('peername')} from game {game_id}")
+                self.spectators_dropped += 1
+                writer.transport.abort()
+            else:
+                writer.write(data)
+                keep.append(writer)
+        self.spectators[game_id] = keep
+
+    def send(self, writer, data):
+        """
+        Buffer data for a player without waiting for it to be sent. A player
+        whose unsent bytes would pass player_buffer is disconnected, which
+        ends the game as a disconnect. Returns False in that case.
+        """
+        if writer.transport.is_closing():
+            return False
+        if writer.transport.get_write_buffer_size() + len(data) > self.player_buffer:
+            print(f"[BACKPRESSURE] Disconnecting slow player {writer.get_extra_info('peername')}")
+            self.players_disconnected += 1
+            writer.transport.abort()
+            return False
+        writer.write(data)
+        return True
+
+    def metrics(self):
+        """
+        Returns outbound buffer metrics across all open connections.
+        """
+        pending = [writer.transport.get_write_buffer_size() for writer in self.writers]
+        return {
+            'connections': len(pending),
+            'bytes_pending': sum(pending),
+            'max_bytes_pending': max(pending, default=0),
+            'players_disconnected': self.players_disconnected,
+            'spectators_dropped': self.spectators_dropped,
+        }
+
+    def close_spectators(self, game_id):
+        """Close a finished game's spectators once their buffers are flushed"""
+        for writer in self.spectators.pop(game_id, []):
+            writer.close()
+
+    async def handle_game_moves(self, reader, writer, game_id, address):
+        """Handle moves for a specific game"""
+        state, p1, p2 = self.games[game_id]
+        player_num = 1 if writer is p1 else 2
+        player_symbol = ttt.X if player_num == 1 else ttt.O
+
+        print(f"[GAME:{game_id}] Player {player_num} ({player_symbol}) ready at {address}")
+
+        while True:
+            try:
+                frame = await protocol.read_frame(reader)
+                if frame is None:
+                    print(f"[GAME:{game_id}] Player {player_num} disconnected")
+                    break
+
+                _, data = frame
+                message = data.decode('utf-8')
+                if not message.startswith('move'):
+                    print(f"[GAME:{game_id}] Unknown message from Player {player_num}: {message}")
+                    continue
+
+                _, coords = message.split(':')
+                i, j = map(int, coords.split(','))
+                print(f"[GAME:{game_id}] Player {player_num} attempts move at ({i},{j})")
+
+                if game_id not in self.games:
+                    break
+                state, p1, p2 = self.games[game_id]
+
+                if state.player() != player_symbol:
+                    print(f"[GAME:{game_id}] Not Player {player_num}'s turn")
+                    if not self.send(writer, protocol.encode_text("error:not_your_turn")):
+                        break
+                    await asyncio.sleep(0)  # Frames already buffered are read without yielding
+                    continue
+
+                try:
+                    state.push((i, j))
+                except ValueError as ve:
+                    print(f"[GAME:{game_id}] Invalid move by Player {player_num}: {ve}")
+                    if not self.send(writer, protocol.encode_text("error:invalid_move")):
+                        break
+                    await asyncio.sleep(0)  # Frames already buffered are read without yielding
+                    continue
+
+                print(f"[GAME:{game_id}] Valid move by Player {player_num} at ({i},{j})")
+
+                # Move delta, with the result pipelined into the same write when the game is over
+                update = protocol.encode_frame(protocol.MSG_MOVE, protocol.encode_move((i, j), player_symbol))
+                game_over = state.terminal()
+                if game_over:
+                    winner = state.winner
+                    if winner is None:
+                        print(f"[GAME:{game_id}] Game ended in a tie")
+                        result = "tie"
+                    else:
+                        winner_num = 1 if winner == ttt.X else 2
+                        print(f"[GAME:{game_id}] Player {winner_num} wins")
+                        result = f"winner:{winner}"
+                    update += protocol.encode_text(f"game_over:{result}")
+
+                self.send(p1, update)
+                if p2:
+                    self.send(p2, update)
+                self.broadcast(game_id, update)
+                await writer.drain()
+
+                if game_over:
+                    print(f"[GAME:{game_id}] Game completed successfully")
+                    self.games.pop(game_id, None)
+                    self.close_spectators(game_id)
+                    return
+
+            except Exception as e:
+                print(f"[ERROR] Error in game {game_id} with Player {player_num}: {e}")
+                break
+
+        # Clean up the game if a player disconnects
+        if game_id in self.games:
+            state, p1, p2 = self.games[game_id]
+            if writer is p1 and p2:
+                print(f"[GAME:{game_id}] Player 1 disconnected, notifying Player 2")
+                self.send(p2, protocol.encode_text("opponent_disconnected"))
+            elif writer is p2 and p1:
+                print(f"[GAME:{game_id}] Player 2 disconnected, notifying Player 1")
+                self.send(p1, protocol.encode_text("opponent_disconnected"))
+            self.broadcast(game_id, protocol.encode_text("player_disconnected"))
+            print(f"[GAME:{game_id}] Game ended due to player disconnect")
+            del self.games[game_id]
+            self.close_spectators(game_id)
+
+
+if __name__ == "__main__":
+    try:
+        server = AsyncTicTacToeServer()
+        print("[SERVER] TicTacToe Server Initializing (asyncio)...")
+        server.start()
+    except Exception as e:
+        print(f"[FATAL] Server failed to start: {e}")
@@ -0,0 +1,129 @@
+"""
+Backpressure benchmark: slow readers next to normal games
+
+Starts some "flooding" players that send out-of-turn moves as fast as they
+can but never read the error replies, so their outbound queues only grow.
+While they run, normal games are played and the server's `stats` are
+polled. Normal move latency should stay flat, the flooders should be
+disconnected by the slow-player policy and their opponents told so, and the
+queue metrics should show where the bytes piled up.
+
+    python -m benchmarks.backpressure --mode threaded --flooders 20 --games 200 --seconds 5
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+
+from benchmarks.common import percentile, start_server, stop_server
+from benchmarks.server_load import play_games
+from async_server import raise_fd_limit
+import protocol
+from netclient import AsyncGameClient
+
+
+async def stats(host, port):
+    client = AsyncGameClient(host, port)
+    await client.connect()
+    try:
+        client.writer.write(protocol.encode_text('stats'))
+        _, message = await client.next_event()
+        return json.loads(message.split(':', 1)[1])
+    finally:
+        client.close()
+
+
+async def flooder(host, port, stop):
+    """Host a game, let an opponent join, then spam out-of-turn moves without reading"""
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)  # Before connect, so the window stays small
+    sock.setblocking(False)
+    loop = asyncio.get_running_loop()
+    await loop.sock_connect(sock, (host, port))
+    await loop.sock_sendall(sock, protocol.encode_text('new'))
+    # new_game:<id>, possibly followed by a resume token in the same read
+    reply = await loop.sock_recv(sock, 256)
+    _, length = protocol.HEADER.unpack_from(reply)
+    game_id = reply[protocol.HEADER.size:protocol.HEADER.size + length].decode('utf-8').split(':')[1]
+
+    opponent = AsyncGameClient(host, port)
+    await opponent.connect()
+    await opponent.join_game(game_id)
+    # Taking the first move leaves every later X move out of turn
+    await loop.sock_sendall(sock, protocol.encode_text('move:0,0'))
+    spam = protocol.encode_text('move:0,0') * 64
+    try:
+        while not stop.is_set():
+            await loop.sock_sendall(sock, spam)
+    except OSError:
+        pass
+    # Did the opponent hear that X was dropped?
+    told = False
+    try:
+        while True:
+            kind, message = await asyncio.wait_for(opponent.next_event(), 2.0)
+            if message == 'opponent_disconnected':
+                told = True
+                break
+    except (OSError, ConnectionError, asyncio.TimeoutError):
+        pass
+    sock.close()
+    opponent.close()
+    return told
+
+
+async def bench(host, port, flooders, games, seconds):
+    stop = asyncio.Event()
+    samples = []
+
+    async def poll():
+        while not stop.is_set():
+            samples.append(await stats(host, port))
+            await asyncio.sleep(0.05)
+
+    flooding = [asyncio.create_task(flooder(host, port, stop)) for _ in range(flooders)]
+    poller = asyncio.create_task(poll())
+    await asyncio.sleep(0.5)
+    latencies, played = await play_games(host, port, games)
+    # Keep flooding for a while even when the games are quick
+    await asyncio.sleep(max(0.0, seconds - played))
+    stop.set()
+    told = await asyncio.gather(*flooding)
+    await poller
+    final = await stats(host, port)
+
+    print(f"  normal games:      {games} ({len(latencies)} moves in {played:.2f}s), "
+          f"p50 {percentile(latencies, 50) * 1000:.1f} ms, p99 {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"  slow players:      {final['players_disconnected']}/{flooders} disconnected, "
+          f"{sum(told)} opponents notified")
+    print(f"  peak bytes pending {max(s['max_bytes_pending'] for s in samples)} on one connection, "
+          f"{max(s['bytes_pending'] for s in samples)} in total")
+    if 'max_queue_depth' in final:
+        print(f"  peak queue depth   {max(s['max_queue_depth'] for s in samples)} frames")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['threaded', 'async', 'both'], default='both')
+    parser.add_argument('--flooders', type=int, default=20)
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=5.0, help="minimum time to keep flooding")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8805)
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    modes = ['threaded', 'async'] if args.mode == 'both' else [args.mode]
+    for offset, mode in enumerate(modes):
+        port = args.port + offset
+        print(f"[BENCH] {mode} server on {args.host}:{port}")
+        process = start_server(mode, args.host, port)
+        try:
+            asyncio.run(bench(args.host, port, args.flooders, args.games, args.seconds))
+        finally:
+            stop_server(process)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Batch evaluation benchmark: batch_evaluate vs per-board Python calls
+
+Samples M reachable positions and computes winner, terminal flag, side to
+move and legal moves for all of them, once with batch_evaluate and once
+with a loop over winner/terminal/player/actions. The loop is only timed up
+to --loop-limit boards and its rate is extrapolated past that.
+
+    python -m benchmarks.batch --sizes 100000 1000000 10000000
+"""
+
+import argparse
+import time
+
+from benchmarks.symmetry import reachable_keys
+import tictactoe as ttt
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def per_board(boards):
+    for board in boards:
+        ttt.winner(board)
+        ttt.terminal(board)
+        ttt.player(board)
+        ttt.actions(board)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000, 10000000])
+    parser.add_argument('--loop-limit', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if np is None:
+        raise SystemExit("This benchmark needs numpy")
+
+    positions = [ttt.key_board(key) for key in sorted(reachable_keys())]
+    table = ttt.board_array(positions)
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'boards':>10}{'batch s':>10}{'boards/s':>14}{'loop s':>10}{'boards/s':>14}{'speedup':>9}")
+    for size in args.sizes:
+        picks = rng.integers(0, len(positions), size)
+        boards = table[picks]
+
+        start = time.perf_counter()
+        ttt.batch_evaluate(boards)
+        batch_seconds = time.perf_counter() - start
+
+        looped = min(size, args.loop_limit)
+        sample = [positions[n] for n in picks[:looped]]
+        start = time.perf_counter()
+        per_board(sample)
+        loop_seconds = (time.perf_counter() - start) * size / looped
+
+        extrapolated = "*" if looped < size else " "
+        print(f"{size:>10}{batch_seconds:>10.3f}{size / batch_seconds:>14.0f}"
+              f"{loop_seconds:>9.2f}{extrapolated}{size / loop_seconds:>14.0f}{loop_seconds / batch_seconds:>8.0f}x")
+    print("* extrapolated from the first --loop-limit boards")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Board encoding benchmark: pickle vs the 9-byte codec vs 2-byte move deltas
+
+    python -m benchmarks.board_codec --rounds 200000
+"""
+
+import argparse
+import pickle
+import timeit
+
+from benchmarks.common import DRAW_SEQUENCE
+import protocol
+import tictactoe as ttt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=200000)
+    args = parser.parse_args()
+
+    board = ttt.initial_state()
+    for action in DRAW_SEQUENCE[:5]:
+        board = ttt.result(board, action)
+    last_move = DRAW_SEQUENCE[4]
+    symbol = board[last_move[0]][last_move[1]]
+
+    pickled = pickle.dumps(board)
+    packed = protocol.encode_board(board)
+    delta = protocol.encode_move(last_move, symbol)
+
+    cases = [
+        ("pickle", len(pickled),
+         lambda: pickle.dumps(board), lambda: pickle.loads(pickled)),
+        ("board (9 bytes)", len(packed),
+         lambda: protocol.encode_board(board), lambda: protocol.decode_board(packed)),
+        ("move delta", len(delta),
+         lambda: protocol.encode_move(last_move, symbol), lambda: protocol.apply_move(board, delta)),
+    ]
+
+    print(f"{'encoding':<18}{'bytes':>7}{'encode us':>12}{'decode us':>12}")
+    for name, size, encode, decode in cases:
+        encode_us = timeit.timeit(encode, number=args.rounds) / args.rounds * 1e6
+        decode_us = timeit.timeit(decode, number=args.rounds) / args.rounds * 1e6
+        print(f"{name:<18}{size:>7}{encode_us:>12.3f}{decode_us:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
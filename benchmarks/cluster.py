@@ -0,0 +1,62 @@
+"""
+Scale-out benchmark for the sharded cluster (cluster.py)
+
+Starts clusters of 1, 2, 4, ... nodes on this box and plays the same game
+load against each, reporting aggregate moves per second. By default every
+client goes through the front door; with --direct each client process
+talks to one node, which is how clients that already know a node (or a
+load balancer in front of the nodes) would connect.
+
+    python -m benchmarks.cluster --nodes 1 2 4 --clients 4 --games 200
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+from benchmarks.common import percentile, wait_for_port
+from benchmarks.workers import client_load
+from async_server import raise_fd_limit
+from cluster import start_cluster
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--nodes', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=4, help="client processes")
+    parser.add_argument('--games', type=int, default=200, help="concurrent games per client process")
+    parser.add_argument('--direct', action='store_true', help="connect to the nodes instead of the front door")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    route = "direct to nodes" if args.direct else "through the front door"
+    print(f"[BENCH] {os.cpu_count()} cores, {args.clients} client processes x {args.games} games, {route}")
+    print(f"{'nodes':>6}{'moves':>8}{'moves/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for n, nodes in enumerate(args.nodes):
+        port = args.port + n * 100
+        processes = start_cluster(args.host, port, nodes)
+        try:
+            for offset in range(nodes + 1):
+                wait_for_port(args.host, port + offset)
+            if args.direct:
+                targets = [port + 1 + client % nodes for client in range(args.clients)]
+            else:
+                targets = [port] * args.clients
+            with multiprocessing.Pool(args.clients) as pool:
+                start = time.perf_counter()
+                results = pool.starmap(client_load, [(args.host, target, args.games) for target in targets])
+                seconds = time.perf_counter() - start
+            latencies = [latency for result in results for latency in result]
+            print(f"{nodes:>6}{len(latencies):>8}{len(latencies) / seconds:>10.0f}"
+                  f"{percentile(latencies, 50) * 1000:>9.2f}{percentile(latencies, 99) * 1000:>9.2f}")
+        finally:
+            for process in processes:
+                process.terminate()
+                process.join(5)
+
+
+if __name__ == "__main__":
+    main()
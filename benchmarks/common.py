@@ -0,0 +1,62 @@
+"""
+Helpers shared by the benchmark scripts
+"""
+
+import multiprocessing
+import os
+import socket
+import sys
+import time
+
+# Make the top-level modules importable when run as `python -m benchmarks.x`
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# A 9-move game that ends in a tie, alternating X and O
+DRAW_SEQUENCE = [(0, 0), (1, 1), (0, 1), (0, 2), (2, 0), (1, 0), (1, 2), (2, 1), (2, 2)]
+
+
+def percentile(values, p):
+    """Return the p-th percentile (0-100) of a list of numbers"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _run_server(mode, host, port, quiet):
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+    if mode == 'async':
+        from async_server import AsyncTicTacToeServer
+        AsyncTicTacToeServer(host, port).start()
+    else:
+        from server import TicTacToeServer
+        TicTacToeServer(host, port).start()
+
+
+def wait_for_port(host, port, timeout=10.0):
+    """Block until something accepts connections on (host, port)"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Nothing listening on {host}:{port}")
+
+
+def start_server(mode, host='127.0.0.1', port=8765, quiet=True):
+    """Start a server of the given mode in a child process and wait until it listens"""
+    process = multiprocessing.Process(target=_run_server, args=(mode, host, port, quiet), daemon=True)
+    process.start()
+    wait_for_port(host, port)
+    return process
+
+
+def stop_server(process):
+    process.terminate()
+    process.join(5)
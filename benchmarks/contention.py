@@ -0,0 +1,41 @@
+"""
+Contention benchmark: move latency with many games in flight at once
+
+Plays N concurrent games against one server and reports p50/p99 move
+latency. With per-game locks the latency should stay flat as N grows
+instead of queueing every move behind every other game.
+
+    python -m benchmarks.contention --games 1 10 100 500
+"""
+
+import argparse
+import asyncio
+
+from benchmarks.common import percentile, start_server, stop_server
+from benchmarks.server_load import play_games
+from async_server import raise_fd_limit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['threaded', 'async'], default='threaded')
+    parser.add_argument('--games', type=int, nargs='+', default=[1, 10, 100, 500])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8775)
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    print(f"[BENCH] {args.mode} server on {args.host}:{args.port}")
+    print(f"{'games':>7}{'moves':>8}{'moves/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    process = start_server(args.mode, args.host, args.port)
+    try:
+        for games in args.games:
+            latencies, seconds = asyncio.run(play_games(args.host, args.port, games))
+            print(f"{games:>7}{len(latencies):>8}{len(latencies) / seconds:>10.0f}"
+                  f"{percentile(latencies, 50) * 1000:>9.2f}{percentile(latencies, 99) * 1000:>9.2f}")
+    finally:
+        stop_server(process)
+
+
+if __name__ == "__main__":
+    main()
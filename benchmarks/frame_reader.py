@@ -0,0 +1,95 @@
+"""
+Receive path benchmark: recv_frame vs FrameReader
+
+Streams the same frames (move deltas, boards and short text messages, as a
+game sends them) through a socket pair and reads them back both ways:
+
+- recv_frame: two recv() calls per frame into fresh bytes objects;
+- FrameReader: recv_into() one reusable buffer, every complete frame in
+  it parsed in place, payloads as memoryviews.
+
+The writer sends --chunk bytes at a time, so each read can find several
+frames waiting, as when a server batches updates or a client falls behind.
+
+    python -m benchmarks.frame_reader --frames 200000 --chunk 4096
+"""
+
+import argparse
+import itertools
+import socket
+import threading
+import time
+
+from benchmarks.common import DRAW_SEQUENCE
+import protocol
+import tictactoe as ttt
+
+
+def stream(frames):
+    board = ttt.initial_state()
+    messages = []
+    for action in DRAW_SEQUENCE:
+        symbol = ttt.player(board)
+        board = ttt.result(board, action)
+        messages.append(protocol.encode_frame(protocol.MSG_MOVE, protocol.encode_move(action, symbol)))
+    messages.append(protocol.encode_frame(protocol.MSG_BOARD, protocol.encode_board(board)))
+    messages.append(protocol.encode_text("game_over:tie"))
+    messages.append(protocol.encode_text("error:not_your_turn"))
+    return b''.join(itertools.islice(itertools.cycle(messages), frames))
+
+
+def run(read, data, frames, chunk):
+    """Returns the seconds read() took to consume every frame of data"""
+    sender, receiver = socket.socketpair()
+
+    def write():
+        view = memoryview(data)
+        for offset in range(0, len(data), chunk):
+            sender.sendall(view[offset:offset + chunk])
+        sender.shutdown(socket.SHUT_WR)
+
+    writer = threading.Thread(target=write)
+    start = time.perf_counter()
+    writer.start()
+    count = read(receiver)
+    seconds = time.perf_counter() - start
+    writer.join()
+    sender.close()
+    receiver.close()
+    assert count == frames, (count, frames)
+    return seconds
+
+
+def read_recv_frame(sock):
+    count = 0
+    while protocol.recv_frame(sock) is not None:
+        count += 1
+    return count
+
+
+def read_frame_reader(sock):
+    reader = protocol.FrameReader(sock)
+    count = 0
+    while reader.read_frame() is not None:
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=200000)
+    parser.add_argument('--chunk', type=int, nargs='+', default=[16, 512, 4096], help="bytes per send")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per reader (best is kept)")
+    args = parser.parse_args()
+
+    data = stream(args.frames)
+    print(f"[BENCH] {args.frames} frames, {len(data)} bytes")
+    print(f"{'chunk':>7}{'reader':>14}{'frames/s':>12}{'us/frame':>10}")
+    for chunk in args.chunk:
+        for name, read in (("recv_frame", read_recv_frame), ("FrameReader", read_frame_reader)):
+            best = min(run(read, data, args.frames, chunk) for _ in range(args.repeat))
+            print(f"{chunk:>7}{name:>14}{args.frames / best:>12.0f}{best / args.frames * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Per-move cost: list-of-lists functions vs the incremental GameState
+
+Replays random games, doing what a server does for every move: check
+whose turn it is, apply the move and ask whether the game is over and who
+won.
+
+    python -m benchmarks.game_state --games 20000
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.common import ROOT  # noqa: F401  (puts the repo on sys.path)
+import tictactoe as ttt
+
+
+def random_games(count, seed):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        board, moves = ttt.initial_state(), []
+        while not ttt.terminal(board):
+            action = rng.choice(sorted(ttt.actions(board)))
+            board = ttt.result(board, action)
+            moves.append(action)
+        games.append(moves)
+    return games
+
+
+def with_functions(games):
+    for moves in games:
+        board = ttt.initial_state()
+        for action in moves:
+            ttt.player(board)
+            board = ttt.result(board, action)
+            if ttt.terminal(board):
+                ttt.winner(board)
+
+
+def with_state(games):
+    for moves in games:
+        state = ttt.GameState()
+        for action in moves:
+            state.player()
+            state.push(action)
+            if state.terminal():
+                state.winner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    games = random_games(args.games, args.seed)
+    moves = sum(len(m) for m in games)
+    for name, replay in (("functions", with_functions), ("GameState", with_state)):
+        start = time.perf_counter()
+        replay(games)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<10} {elapsed / moves * 1e6:8.3f} us/move ({moves} moves)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Allocation benchmark: copying search vs make/unmake in place
+
+Runs each search under tracemalloc and reports its time, the peak memory
+traced while it ran and what it left allocated afterwards. The copying
+searches hold a fresh board for every level of the current path; the
+in-place search only holds its one GameState. Times include tracemalloc
+overhead, so compare them with each other rather than with
+benchmarks.search.
+
+    python -m benchmarks.inplace
+"""
+
+import time
+import tracemalloc
+
+from benchmarks.common import DRAW_SEQUENCE
+from benchmarks.search import plain_minimax
+import tictactoe as ttt
+
+
+ENGINES = [
+    ("plain minimax (copies)", plain_minimax),
+    ("alpha-beta (copies)", ttt.alphabeta),
+    ("in place", ttt.inplace_minimax),
+]
+
+
+def measure(engine, board):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    engine(board)
+    elapsed = time.perf_counter() - start
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak - before, after - before
+
+
+def main():
+    print(f"{'engine':<26}{'played':>7}{'time ms':>10}{'peak KiB':>10}{'retained B':>12}")
+    for name, engine in ENGINES:
+        for played in (0, 1, 2):
+            board = ttt.initial_state()
+            for action in DRAW_SEQUENCE[:played]:
+                board = ttt.result(board, action)
+            elapsed, peak, retained = measure(engine, board)
+            print(f"{name:<26}{played:>7}{elapsed * 1000:>10.1f}{peak / 1024:>10.2f}{retained:>12}")
+
+
+if __name__ == "__main__":
+    main()
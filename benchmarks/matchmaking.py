@@ -0,0 +1,90 @@
+"""
+Matchmaking benchmark: quick_match pairing rate and queue wait
+
+First times MatchQueue.match on its own, with more and more players already
+waiting in other rating buckets, to show that pairing cost does not grow with
+the queue. Then sends quick_match from many connections to a live server and
+reports pairings per second and the wait between queueing and being paired.
+Players disconnect as soon as they are paired, so no moves are played.
+
+    python -m benchmarks.matchmaking --mode async --pairs 5000 --concurrency 500
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import percentile, start_server, stop_server
+from async_server import raise_fd_limit
+from matchmaking import MatchQueue
+from netclient import AsyncGameClient
+
+
+def queue_rate(backlog, pairs=100000):
+    """Pairings per second with `backlog` players waiting in other buckets"""
+    queue = MatchQueue(bucket_width=1)
+    for n in range(backlog):
+        queue.match(('idle', n), rating=10 + n)
+    start = time.perf_counter()
+    for n in range(pairs):
+        queue.match(n, rating=0)
+        queue.match(n, rating=0)
+    return pairs / (time.perf_counter() - start)
+
+
+async def matched(host, port, waits):
+    client = AsyncGameClient(host, port)
+    await client.connect()
+    try:
+        start = time.perf_counter()
+        if await client.quick_match() is None:
+            raise RuntimeError("quick_match refused")
+        if client.symbol == 'X':
+            await client.next_event()  # opponent_joined
+        waits.append(time.perf_counter() - start)
+    finally:
+        client.close()
+
+
+async def pair_players(host, port, pairs, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+    waits = []
+
+    async def one():
+        async with gate:
+            await matched(host, port, waits)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(2 * pairs)))
+    return waits, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['threaded', 'async', 'both'], default='both')
+    parser.add_argument('--pairs', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=200, help="players in flight at once (even)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8785)
+    args = parser.parse_args()
+
+    print(f"{'waiting':>9}{'pairs/s':>12}")
+    for backlog in (0, 10000, 100000):
+        print(f"{backlog:>9}{queue_rate(backlog):>12.0f}")
+
+    raise_fd_limit()
+    modes = ['threaded', 'async'] if args.mode == 'both' else [args.mode]
+    print(f"\n{'server':<10}{'pairs':>7}{'pairs/s':>10}{'wait p50 ms':>13}{'wait p99 ms':>13}")
+    for n, mode in enumerate(modes):
+        port = args.port + n
+        process = start_server(mode, args.host, port)
+        try:
+            waits, seconds = asyncio.run(pair_players(args.host, port, args.pairs, args.concurrency))
+            print(f"{mode:<10}{args.pairs:>7}{args.pairs / seconds:>10.0f}"
+                  f"{percentile(waits, 50) * 1000:>13.2f}{percentile(waits, 99) * 1000:>13.2f}")
+        finally:
+            stop_server(process)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Move log benchmark: what each fsync policy costs
+
+First appends move records straight to a MoveLog from 1 and 16 threads,
+reporting records per second, fsyncs issued and append latency. Then plays
+concurrent games against a threaded server with no log and with each
+policy, reporting moves per second.
+
+    python -m benchmarks.movelog --records 2000 --games 50 --dir /tmp
+
+Numbers depend entirely on the disk under --dir: an fsync is microseconds
+on tmpfs and milliseconds on a real drive.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import percentile, wait_for_port
+from benchmarks.server_load import play_games
+from movelog import MoveLog, POLICIES
+
+
+def append_load(path, policy, threads, records):
+    log = MoveLog(path, policy)
+    latencies = []
+    per_thread = records // threads
+
+    def run(worker):
+        for n in range(per_thread):
+            start = time.perf_counter()
+            log.move(f"{worker}-{n // 9}", n % 9, divmod(n % 9, 3))
+            latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=run, args=(worker,)) for worker in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    seconds = time.perf_counter() - start
+    fsyncs = log.fsyncs
+    log.close()
+    return len(latencies) / seconds, fsyncs, latencies
+
+
+def _run_server(host, port, log_path, policy):
+    sys.stdout = open(os.devnull, 'w')
+    from server import TicTacToeServer
+    TicTacToeServer(host, port, log_path=log_path, fsync=policy).start()
+
+
+def server_load(host, port, log_path, policy, games):
+    process = multiprocessing.Process(target=_run_server, args=(host, port, log_path, policy), daemon=True)
+    process.start()
+    try:
+        wait_for_port(host, port)
+        latencies, seconds = asyncio.run(play_games(host, port, games))
+    finally:
+        process.terminate()
+        process.join(5)
+    return len(latencies) / seconds, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=2000, help="records per append run")
+    parser.add_argument('--games', type=int, default=50, help="concurrent games per server run")
+    parser.add_argument('--dir', default=None, help="directory for the log files")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8960)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        print(f"[BENCH] log files in {directory}")
+        print(f"{'policy':>9}{'threads':>9}{'records/s':>11}{'fsyncs':>8}{'p50 ms':>9}{'p99 ms':>9}")
+        for policy in POLICIES:
+            for threads in (1, 16):
+                path = os.path.join(directory, f"append-{policy}-{threads}.log")
+                rate, fsyncs, latencies = append_load(path, policy, threads, args.records)
+                print(f"{policy:>9}{threads:>9}{rate:>11.0f}{fsyncs:>8}"
+                      f"{percentile(latencies, 50) * 1000:>9.3f}{percentile(latencies, 99) * 1000:>9.3f}")
+
+        print()
+        print(f"{'server':>9}{'moves/s':>11}{'p50 ms':>9}{'p99 ms':>9}")
+        for n, policy in enumerate((None,) + POLICIES):
+            path = os.path.join(directory, f"server-{policy}.log") if policy else None
+            rate, latencies = server_load(args.host, args.port + n, path, policy or 'group', args.games)
+            print(f"{policy or 'no log':>9}{rate:>11.0f}"
+                  f"{percentile(latencies, 50) * 1000:>9.2f}{percentile(latencies, 99) * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
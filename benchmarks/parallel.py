@@ -0,0 +1,61 @@
+"""
+Parallel search benchmark: process pool vs threads vs sequential search
+
+Every engine here runs the same full min_val/max_val search under each root
+move, so the difference is only in how the work is spread over cores.
+
+    python -m benchmarks.parallel --workers 4
+"""
+
+import argparse
+import math
+import os
+import time
+
+from benchmarks.common import DRAW_SEQUENCE
+from benchmarks.search import plain_minimax
+import tictactoe as ttt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--repeat', type=int, default=3, help="runs per engine and position (best is kept)")
+    parser.add_argument('--depths', type=int, nargs='+', default=[0, 1, 2, 3], help="moves played before searching")
+    args = parser.parse_args()
+
+    pool = ttt.search_pool(args.workers)
+    # Start the workers before timing; a long-lived pool pays this once
+    warm_up = ttt.initial_state()
+    for action in DRAW_SEQUENCE[:6]:
+        warm_up = ttt.result(warm_up, action)
+    list(pool.map(ttt._search_value, [warm_up] * args.workers))
+
+    engines = [
+        ("sequential", plain_minimax),
+        ("threaded_minimax", ttt.threaded_minimax),
+        ("process pool, root", lambda board: ttt.parallel_minimax(board, pool, 1)),
+        ("process pool, sub-root", lambda board: ttt.parallel_minimax(board, pool, 2)),
+    ]
+
+    print(f"{args.workers} worker processes, {os.cpu_count()} CPUs")
+    print(f"{'engine':<24}" + "".join(f"{f'{d} played':>14}" for d in args.depths))
+    for name, engine in engines:
+        row = f"{name:<24}"
+        for depth in args.depths:
+            board = ttt.initial_state()
+            for action in DRAW_SEQUENCE[:depth]:
+                board = ttt.result(board, action)
+            best = math.inf
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                engine(board)
+                best = min(best, time.perf_counter() - start)
+            row += f"{best * 1000:>11.1f} ms"
+        print(row)
+
+    ttt.shutdown_search_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Client render loop benchmark
+
+Runs the game screen headless (SDL dummy video driver) two ways for a few
+seconds each while a move lands every --interval seconds:
+
+- old: the original loop, which polls events, renders every label and
+  flips the whole window as fast as it can;
+- new: render.Renderer, which sleeps in event.wait until something
+  happens, reuses rendered text and updates only the changed rects.
+
+Reports CPU use, loop iterations, repaints, the time to build and present
+a repainted frame, and the pixels pushed per repaint.
+
+    python -m benchmarks.render --seconds 5 --interval 0.5
+"""
+
+import argparse
+import os
+import threading
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+from benchmarks.common import DRAW_SEQUENCE, ROOT, percentile
+import pygame
+import render
+import tictactoe as ttt
+
+black = (0, 0, 0)
+white = (255, 255, 255)
+width, height = 600, 400
+
+
+def tiles():
+    tile_size = 80
+    origin = (width / 2 - 1.5 * tile_size, height / 2 - 1.5 * tile_size)
+    return [[(origin[0] + j * tile_size, origin[1] + i * tile_size, tile_size, tile_size)
+             for j in range(3)] for i in range(3)]
+
+
+def draw_old(screen, fonts, board):
+    """The game screen as client.py drew it: everything, every frame"""
+    medium, large, move = fonts
+    screen.fill(black)
+    for i, row in enumerate(tiles()):
+        for j, tile in enumerate(row):
+            rect = pygame.Rect(tile)
+            pygame.draw.rect(screen, white, rect, 3)
+            if board[i][j] != ttt.EMPTY:
+                text = move.render(board[i][j], True, white)
+                screen.blit(text, text.get_rect(center=rect.center))
+    title = large.render(f"Play as {ttt.player(board)}", True, white)
+    screen.blit(title, title.get_rect(center=(width / 2, 30)))
+    game = medium.render("Game ID: 17", True, white)
+    screen.blit(game, game.get_rect(center=(width / 2, height - 30)))
+    pygame.display.flip()
+    return width * height
+
+
+def draw_new(ui, fonts, board):
+    medium, large, move = fonts
+    for i, row in enumerate(tiles()):
+        for j, tile in enumerate(row):
+            rect = ui.rect(white, tile, 3)
+            if board[i][j] != ttt.EMPTY:
+                ui.text(move, board[i][j], white, rect.center)
+    ui.text(large, f"Play as {ttt.player(board)}", white, (width / 2, 30))
+    ui.text(medium, "Game ID: 17", white, (width / 2, height - 30))
+    return sum(rect.width * rect.height for rect in ui.present())
+
+
+def run(mode, screen, fonts, seconds, interval):
+    state = {'board': ttt.initial_state(), 'moves': 0}
+    done = threading.Event()
+
+    def play():
+        # Stands in for the network listener: a move every interval
+        while not done.wait(interval):
+            if ttt.terminal(state['board']):
+                state['board'], state['moves'] = ttt.initial_state(), 0
+            state['board'] = ttt.result(state['board'], DRAW_SEQUENCE[state['moves']])
+            state['moves'] += 1
+            render.wake()
+
+    ui = render.Renderer(screen, black)
+    iterations = 0
+    frame_times = []
+    pixels = []
+    shown = None
+    mover = threading.Thread(target=play, daemon=True)
+    cpu, wall = time.process_time(), time.perf_counter()
+    mover.start()
+    while time.perf_counter() - wall < seconds:
+        iterations += 1
+        if mode == 'old':
+            pygame.event.get()
+        else:
+            ui.events()
+        start = time.perf_counter()
+        board = state['board']
+        if mode == 'old':
+            pushed = draw_old(screen, fonts, board)
+        else:
+            pushed = draw_new(ui, fonts, board)
+        # Count only the frames that showed something new
+        if board is not shown:
+            shown = board
+            frame_times.append(time.perf_counter() - start)
+            pixels.append(pushed)
+    done.set()
+    elapsed = time.perf_counter() - wall
+    return {
+        'cpu': (time.process_time() - cpu) / elapsed * 100,
+        'iterations': iterations,
+        'repaints': len(frame_times),
+        'p50': percentile(frame_times, 50) * 1000,
+        'p99': percentile(frame_times, 99) * 1000,
+        'pixels': sum(pixels) / max(1, len(pixels)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--interval', type=float, default=0.5, help="seconds between moves")
+    args = parser.parse_args()
+
+    pygame.init()
+    screen = pygame.display.set_mode((width, height))
+    font = os.path.join(ROOT, "OpenSans-Regular.ttf")
+    fonts = (pygame.font.Font(font, 28), pygame.font.Font(font, 40), pygame.font.Font(font, 60))
+
+    print(f"[BENCH] {args.seconds:.0f}s per loop, a move every {args.interval}s, "
+          f"video driver {os.environ['SDL_VIDEODRIVER']}")
+    print(f"{'loop':>5}{'cpu %':>8}{'loops':>9}{'repaints':>10}{'p50 ms':>9}{'p99 ms':>9}{'pixels':>9}")
+    for mode in ('old', 'new'):
+        result = run(mode, screen, fonts, args.seconds, args.interval)
+        print(f"{mode:>5}{result['cpu']:>8.1f}{result['iterations']:>9}{result['repaints']:>10}"
+              f"{result['p50']:>9.2f}{result['p99']:>9.2f}{result['pixels']:>9.0f}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
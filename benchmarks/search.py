@@ -0,0 +1,113 @@
+"""
+AI search benchmark
+
+Times each search engine in tictactoe.py on the same positions, from the
+empty board down to a few moves in. Then runs the iterative deepening
+search with a few time budgets and shows how long it took to answer and
+how deep it got (9 is the whole game).
+
+    python -m benchmarks.search --repeat 3
+"""
+
+import argparse
+import math
+import time
+
+from benchmarks.common import DRAW_SEQUENCE
+import tictactoe as ttt
+
+
+def plain_minimax(board):
+    """The original full-tree search: min_val/max_val on every root move"""
+    if ttt.terminal(board):
+        return None
+    best_move = None
+    if ttt.player(board) == ttt.X:
+        v = -math.inf
+        for action in ttt.actions(board):
+            value = ttt.min_val(ttt.result(board, action))
+            if value > v:
+                v, best_move = value, action
+    else:
+        v = math.inf
+        for action in ttt.actions(board):
+            value = ttt.max_val(ttt.result(board, action))
+            if value < v:
+                v, best_move = value, action
+    return best_move
+
+
+def plain_nodes(board):
+    """Count the nodes the plain search visits below (and including) board"""
+    if ttt.terminal(board):
+        return 1
+    return 1 + sum(plain_nodes(ttt.result(board, action)) for action in ttt.actions(board))
+
+
+def memoized(board):
+    return ttt.solve(board)[1]
+
+
+def memoized_cold(board):
+    ttt.clear_solver_cache()
+    return memoized(board)
+
+
+# (name, engine, warm up before timing)
+ENGINES = [
+    ("plain minimax", plain_minimax, False),
+    ("memoized (cold)", memoized_cold, False),
+    ("memoized (warm)", memoized, True),
+    ("alpha-beta", ttt.alphabeta, False),
+    ("solved table", ttt.minimax, True),
+]
+
+
+def positions():
+    """Yield (moves played, board) along a drawn game"""
+    board = ttt.initial_state()
+    for played, action in enumerate(DRAW_SEQUENCE[:4]):
+        yield played, board
+        board = ttt.result(board, action)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help="runs per engine and position (best is kept)")
+    parser.add_argument('--budgets', type=float, nargs='+', default=[1, 5, 20, 100],
+                        help="time budgets for the deepening search, in ms")
+    args = parser.parse_args()
+
+    print(f"{'engine':<20}" + "".join(f"{f'{n} played':>14}" for n, _ in positions()))
+    for name, engine, warm_up in ENGINES:
+        row = f"{name:<20}"
+        for _, board in positions():
+            if warm_up:
+                engine(board)
+            best = math.inf
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                engine(board)
+                best = min(best, time.perf_counter() - start)
+            row += f"{best * 1000:>11.3f} ms"
+        print(row)
+    print(f"solver cache: {ttt.solver_cache_info()}")
+
+    print()
+    print(f"{'nodes visited':<20}" + "".join(f"{f'{n} played':>14}" for n, _ in positions()))
+    print(f"{'plain minimax':<20}" + "".join(f"{plain_nodes(board):>14}" for _, board in positions()))
+    print(f"{'alpha-beta':<20}" + "".join(f"{ttt.alphabeta_search(board)[2]:>14}" for _, board in positions()))
+
+    print()
+    print(f"{'deepening budget':<20}" + "".join(f"{f'{n} played':>14}" for n, _ in positions()))
+    for budget in args.budgets:
+        row = f"{f'{budget:g} ms':<20}"
+        for _, board in positions():
+            start = time.perf_counter()
+            _, _, depth = ttt.deepening_search(board, time.monotonic() + budget / 1000)
+            row += f"{(time.perf_counter() - start) * 1000:>7.1f} ms d{depth}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
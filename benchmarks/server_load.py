@@ -0,0 +1,142 @@
+"""
+Load benchmark: threaded TicTacToeServer vs AsyncTicTacToeServer
+
+Opens many idle lobby connections (each sends `new` and waits for an
+opponent) to show how many sockets a server holds, then plays concurrent
+games to measure moves per second and move latency.
+
+    python -m benchmarks.server_load --mode both --connections 5000 --games 20
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import DRAW_SEQUENCE, percentile, start_server, stop_server
+from async_server import raise_fd_limit
+import protocol
+
+class MessageReader:
+    """Reads framed server messages as ('board' | 'text', payload) pairs"""
+
+    def __init__(self, reader):
+        self.reader = reader
+
+    async def next(self):
+        while True:
+            frame = await protocol.read_frame(self.reader)
+            if frame is None:
+                raise ConnectionError("server closed the connection")
+            msg_type, payload = frame
+            if msg_type in (protocol.MSG_BOARD, protocol.MSG_MOVE):
+                return ('board', payload)
+            message = payload.decode('utf-8')
+            if not message.startswith('token:'):  # Resume tokens are not needed here
+                return ('text', message)
+
+    async def expect_board(self):
+        kind, message = await self.next()
+        if kind != 'board':
+            raise RuntimeError(f"expected a board update, got {message}")
+
+
+async def hold_connections(host, port, count, concurrency=200, timeout=10.0):
+    """Open `count` lobby connections and return (held, seconds_to_open, writers)"""
+    gate = asyncio.Semaphore(concurrency)
+    writers = []
+
+    async def lobby():
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(protocol.encode_text('new'))
+        kind, message = await MessageReader(reader).next()
+        if message.startswith('new_game:'):
+            writers.append(writer)
+        else:
+            writer.close()
+
+    async def open_one():
+        async with gate:
+            try:
+                # A server that ran out of file descriptors never answers
+                await asyncio.wait_for(lobby(), timeout)
+            except (OSError, ConnectionError, asyncio.TimeoutError):
+                pass
+
+    start = time.perf_counter()
+    await asyncio.gather(*(open_one() for _ in range(count)))
+    return len(writers), time.perf_counter() - start, writers
+
+
+async def play_pair(host, port, latencies):
+    """Play one drawn game between two fresh connections"""
+    r1, w1 = await asyncio.open_connection(host, port)
+    s1 = MessageReader(r1)
+    w1.write(protocol.encode_text('new'))
+    _, message = await s1.next()
+    game_id = message.split(':')[1]
+
+    r2, w2 = await asyncio.open_connection(host, port)
+    s2 = MessageReader(r2)
+    w2.write(protocol.encode_text(f'join:{game_id}'))
+    await s2.next()
+    await s1.next()  # opponent_joined
+
+    writers = (w1, w2)
+    for n, (i, j) in enumerate(DRAW_SEQUENCE):
+        start = time.perf_counter()
+        writers[n % 2].write(protocol.encode_text(f'move:{i},{j}'))
+        await asyncio.gather(s1.expect_board(), s2.expect_board())
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(s1.next(), s2.next())  # game_over
+    w1.close()
+    w2.close()
+
+
+async def play_games(host, port, games):
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(play_pair(host, port, latencies) for _ in range(games)))
+    return latencies, time.perf_counter() - start
+
+
+async def bench(host, port, connections, games):
+    held, open_seconds, writers = await hold_connections(host, port, connections)
+    print(f"  connections held:  {held}/{connections} (opened in {open_seconds:.2f}s, "
+          f"{held / open_seconds:.0f} conn/s)")
+
+    # Games are played while the idle connections are still open
+    latencies, seconds = await play_games(host, port, games)
+    moves = len(latencies)
+    print(f"  games played:      {games} ({moves} moves in {seconds:.2f}s)")
+    print(f"  moves per second:  {moves / seconds:.1f}")
+    print(f"  move latency:      p50 {percentile(latencies, 50) * 1000:.1f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.1f} ms")
+
+    for writer in writers:
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['threaded', 'async', 'both'], default='both')
+    parser.add_argument('--connections', type=int, default=2000, help="idle lobby connections to hold")
+    parser.add_argument('--games', type=int, default=10, help="concurrent games to play")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    modes = ['threaded', 'async'] if args.mode == 'both' else [args.mode]
+    for offset, mode in enumerate(modes):
+        port = args.port + offset
+        print(f"[BENCH] {mode} server on {args.host}:{port}")
+        process = start_server(mode, args.host, port)
+        try:
+            asyncio.run(bench(args.host, port, args.connections, args.games))
+        finally:
+            stop_server(process)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Spectator fan-out benchmark
+
+Plays a drawn game while N spectators watch it, and one extra spectator
+that never reads its socket. Reports the players' move latency (move sent
+until the mover sees the update) and the fan-out latency (move sent until
+the last spectator has it). The player latency should barely move as N
+grows: updates are encoded once and queued per spectator instead of being
+written to each one in turn while the game is locked.
+
+    python -m benchmarks.spectators --mode threaded --spectators 0 10 100 1000
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+
+from benchmarks.common import DRAW_SEQUENCE, percentile, start_server, stop_server
+from async_server import raise_fd_limit
+import protocol
+from netclient import AsyncGameClient
+
+
+async def connect(host, port):
+    client = AsyncGameClient(host, port)
+    await client.connect()
+    return client
+
+
+async def watched_game(host, port, spectators):
+    """Return (player latencies, fan-out latencies) for one game with `spectators` watchers"""
+    x, o = await connect(host, port), await connect(host, port)
+    game_id = await x.create_game()
+    await o.join_game(game_id)
+    await x.next_event()  # opponent_joined
+
+    watchers = await asyncio.gather(*(connect(host, port) for _ in range(spectators)))
+    for watcher in watchers:
+        await watcher.watch(game_id)
+        await watcher.next_event()  # current board
+    # A spectator that never reads must not hold anybody up
+    stalled = socket.create_connection((host, port))
+    stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024)
+    protocol.send_text(stalled, f"watch:{game_id}")
+
+    async def until_move(client):
+        while (await client.next_event())[0] != 'move':
+            pass
+
+    player_latency, fanout_latency = [], []
+    for n, action in enumerate(DRAW_SEQUENCE):
+        mover, other = (x, o) if n % 2 == 0 else (o, x)
+        sent = time.perf_counter()
+        await mover.send_move(action)
+        await until_move(mover)
+        player_latency.append(time.perf_counter() - sent)
+        await asyncio.gather(until_move(other), *(until_move(w) for w in watchers))
+        fanout_latency.append(time.perf_counter() - sent)
+
+    for client in [x, o, *watchers]:
+        client.close()
+    stalled.close()
+    return player_latency, fanout_latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['threaded', 'async'], default='threaded')
+    parser.add_argument('--spectators', type=int, nargs='+', default=[0, 10, 100, 1000])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8795)
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    print(f"[BENCH] {args.mode} server on {args.host}:{args.port}")
+    print(f"{'watchers':>9}{'move p50 ms':>13}{'move max ms':>13}{'fan-out p50 ms':>16}{'fan-out max ms':>16}")
+    process = start_server(args.mode, args.host, args.port)
+    try:
+        for spectators in args.spectators:
+            player, fanout = asyncio.run(watched_game(args.host, args.port, spectators))
+            print(f"{spectators:>9}{percentile(player, 50) * 1000:>13.2f}{max(player) * 1000:>13.2f}"
+                  f"{percentile(fanout, 50) * 1000:>16.2f}{max(fanout) * 1000:>16.2f}")
+    finally:
+        stop_server(process)
+
+
+if __name__ == "__main__":
+    main()
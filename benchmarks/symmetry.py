@@ -0,0 +1,65 @@
+"""
+Symmetry benchmark: caches keyed on raw vs canonical (D4-reduced) boards
+
+Builds a value cache over every reachable position twice, once keyed on
+board_key and once on canonical_key, then compares entries, memory and
+lookup cost, plus a cold memoized solve.
+
+    python -m benchmarks.symmetry
+"""
+
+import sys
+import time
+
+from benchmarks.common import ROOT  # noqa: F401  (puts the repo on sys.path)
+import tictactoe as ttt
+
+
+def reachable_keys():
+    keys = set()
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        key = ttt.board_key(board)
+        if key in keys:
+            continue
+        keys.add(key)
+        if not ttt.terminal(board):
+            stack.extend(ttt.result(board, action) for action in ttt.actions(board))
+    return keys
+
+
+def cache_bytes(cache):
+    """Size of the dict plus its key and value objects"""
+    return sys.getsizeof(cache) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in cache.items())
+
+
+def main():
+    keys = reachable_keys()
+    raw = {key: ttt.book_value(ttt.key_board(key)) for key in keys}
+    canonical = {ttt.canonical_key(key): value for key, value in raw.items()}
+
+    start = time.perf_counter()
+    for key in keys:
+        raw[key]
+    raw_lookup = (time.perf_counter() - start) / len(keys)
+
+    start = time.perf_counter()
+    for key in keys:
+        canonical[ttt.canonical_key(key)]
+    canonical_lookup = (time.perf_counter() - start) / len(keys)
+
+    print(f"{'cache key':<12}{'entries':>9}{'KiB':>9}{'lookup us':>11}")
+    print(f"{'raw':<12}{len(raw):>9}{cache_bytes(raw) / 1024:>9.1f}{raw_lookup * 1e6:>11.3f}")
+    print(f"{'canonical':<12}{len(canonical):>9}{cache_bytes(canonical) / 1024:>9.1f}"
+          f"{canonical_lookup * 1e6:>11.3f}")
+
+    ttt.clear_solver_cache()
+    start = time.perf_counter()
+    ttt.solve(ttt.initial_state())
+    print(f"cold solve of the empty board: {(time.perf_counter() - start) * 1000:.1f} ms, "
+          f"{ttt.solver_cache_info().currsize} cached positions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Win detection benchmark for N x N, K-in-a-row variants
+
+Plays random games on each variant and times the per-move win check:
+wins_at (lines through the last cell) against a full winner() scan, with
+tictactoe.winner as the 3x3 baseline.
+
+    python -m benchmarks.variants --games 200
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.common import ROOT  # noqa: F401  (puts the repo on sys.path)
+import tictactoe as ttt
+from variants import Variant
+
+
+def random_games(variant, games, seed):
+    """Return (state after the move, action, mover) for every move played"""
+    rng = random.Random(seed)
+    moves = []
+    for _ in range(games):
+        state = variant.initial_state()
+        while True:
+            action = rng.choice(variant.actions(state))
+            mover = variant.player(state)
+            state = variant.result(state, action)
+            moves.append((state, action, mover))
+            bits = state[0] if mover == ttt.X else state[1]
+            if variant.wins_at(bits, action) or not variant.actions(state):
+                break
+    return moves
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'variant':<10}{'lines':>7}{'moves':>9}{'wins_at us':>12}{'winner() us':>13}{'3x3 lists us':>14}")
+    for size, k in ((3, 3), (4, 4), (5, 4), (7, 5), (15, 5)):
+        variant = Variant(size, k)
+        moves = random_games(variant, args.games, args.seed)
+
+        start = time.perf_counter()
+        for state, action, mover in moves:
+            variant.wins_at(state[0] if mover == ttt.X else state[1], action)
+        incremental = (time.perf_counter() - start) / len(moves)
+
+        start = time.perf_counter()
+        for state, _, _ in moves:
+            variant.winner(state)
+        full = (time.perf_counter() - start) / len(moves)
+
+        baseline = ""
+        if size == 3:
+            boards = [variant.to_board(state) for state, _, _ in moves]
+            start = time.perf_counter()
+            for board in boards:
+                ttt.winner(board)
+            baseline = f"{(time.perf_counter() - start) / len(moves) * 1e6:>14.3f}"
+
+        print(f"{f'{size}x{size}/{k}':<10}{len(variant.lines):>7}{len(moves):>9}"
+              f"{incremental * 1e6:>12.3f}{full * 1e6:>13.3f}{baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Scaling benchmark for the multi-process server (workers.py)
+
+Runs the same game load against 1, 2, 4, ... SO_REUSEPORT workers and
+reports aggregate moves per second. The load comes from several client
+processes so the clients are not the bottleneck; about half of the joins
+land on a worker that does not own the game and are relayed.
+
+    python -m benchmarks.workers --workers 1 2 4 --clients 4 --games 200
+
+Scaling is bounded by the cores the machine has: with one core more
+workers only add relay and scheduling overhead.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+from benchmarks.common import percentile, wait_for_port
+from benchmarks.server_load import play_games
+from async_server import raise_fd_limit
+from workers import start_workers
+
+
+def client_load(host, port, games):
+    raise_fd_limit()
+    latencies, _ = asyncio.run(play_games(host, port, games))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=4, help="client processes")
+    parser.add_argument('--games', type=int, default=200, help="concurrent games per client process")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8815)
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    print(f"[BENCH] {os.cpu_count()} cores, {args.clients} client processes x {args.games} games")
+    print(f"{'workers':>8}{'moves':>8}{'moves/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for n, workers in enumerate(args.workers):
+        port = args.port + n * 100
+        processes = start_workers(args.host, port, workers, quiet=True)
+        try:
+            wait_for_port(args.host, port)
+            with multiprocessing.Pool(args.clients) as pool:
+                start = time.perf_counter()
+                results = pool.starmap(client_load, [(args.host, port, args.games)] * args.clients)
+                seconds = time.perf_counter() - start
+            latencies = [latency for result in results for latency in result]
+            print(f"{workers:>8}{len(latencies):>8}{len(latencies) / seconds:>10.0f}"
+                  f"{percentile(latencies, 50) * 1000:>9.2f}{percentile(latencies, 99) * 1000:>9.2f}")
+        finally:
+            for process in processes:
+                process.terminate()
+                process.join(5)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 import pygame
 import sys
-import time
 import socket
-import pickle
 import threading
+import time
 
 import tictactoe as ttt
+import protocol
+import render
+from ai_service import AIService
 
 pygame.init()
 size = width, height = 600, 400
@@ -20,10 +22,19 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+ui = render.Renderer(screen, black)
+
+# The computer's moves are searched on a background thread, so the window
+# keeps drawing; each answer comes within AI_BUDGET seconds
+AI_BUDGET = 0.5
+ai = AIService(workers=1, budget=AI_BUDGET, deepening=True)
+
 # Game variables
 user = None
 board = ttt.initial_state()
-ai_turn = False
+board_state = None  # GameState of the board last drawn; turn and winner come from it
+board_state_of = None  # The board list board_state was built from
+ai_move = None  # MoveRequest for the computer's pending move
 game_mode = None  # "ai", "host", or "join"
 client_socket = None
 game_id = None
@@ -31,6 +42,8 @@ player_symbol = None
 network_turn = False
 waiting_for_opponent = False
 opponent_disconnected = False
+opponent_away = False  # The opponent dropped; the server holds their seat for a while
+resume_token = None  # Sent by the server; takes our seat back if the connection drops
 
 # Network message queue
 message_queue = []
@@ -41,17 +54,34 @@ def connect_to_server(host='192.168.22.71', port=8000):
     try:
         client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         client_socket.connect((host, port))
+        # Moves are single small frames; send them without waiting on Nagle
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         return True
     except Exception as e:
         print(f"Failed to connect: {e}")
         return False
 
+def resume_session(attempts=5):
+    """After a dropped connection, reconnect and ask for our seat back"""
+    for _ in range(attempts):
+        time.sleep(1)
+        if not resume_token:
+            return False  # Left the game meanwhile
+        if connect_to_server():
+            try:
+                protocol.send_text(client_socket, f"resume:{resume_token}")
+                return True
+            except OSError:
+                pass
+    return False
+
 def create_game():
     """Create a new network game"""
     global game_id, player_symbol, waiting_for_opponent
     if client_socket:
-        client_socket.send("new".encode('utf-8'))
-        response = client_socket.recv(1024).decode('utf-8')
+        protocol.send_text(client_socket, "new")
+        frame = protocol.recv_frame(client_socket)
+        response = frame[1].decode('utf-8') if frame else ""
         if response.startswith("new_game"):
             _, game_id = response.split(":")
             player_symbol = ttt.X
@@ -63,77 +93,86 @@ def join_game(game_to_join):
     """Join an existing network game"""
     global game_id, player_symbol
     if client_socket:
-        client_socket.send(f"join:{game_to_join}".encode('utf-8'))
-        response = client_socket.recv(1024).decode('utf-8')
+        protocol.send_text(client_socket, f"join:{game_to_join}")
+        frame = protocol.recv_frame(client_socket)
+        response = frame[1].decode('utf-8') if frame else ""
         if response.startswith("joined"):
             _, game_id = response.split(":")
             player_symbol = ttt.O
             return True
+        if response.startswith("resumed"):
+            # A game the server restored after a restart; the board follows
+            _, game_id, player_symbol = response.split(":")
+            return True
     return False
 
 def listen_for_messages():
     """Background thread to listen for server messages"""
-    global board, network_turn, message_queue, client_socket, waiting_for_opponent, opponent_disconnected
+    global board, network_turn, message_queue, client_socket, waiting_for_opponent, opponent_disconnected, resume_token
+    # One buffer for the whole connection; several frames in one read are all parsed
+    reader = protocol.FrameReader(client_socket)
     while client_socket:
         try:
-            data = client_socket.recv(1024)
-            if not data:
+            frame = reader.read_frame()
+            if frame is None:
+                # Lost mid-game: take the seat back on a new connection
+                if resume_token and not ttt.terminal(board) and resume_session():
+                    reader = protocol.FrameReader(client_socket)
+                    continue
                 break
-                
-            try:
-                message = data.decode('utf-8')
-                
-                # Handle board update message
-                if message.startswith("board_update:"):
-                    # Extract the data length
-                    _, length_str = message.split(':', 1)
-                    data_length = int(length_str)
-                    
-                    # Now receive the actual board data
-                    board_data = b''
-                    remaining = data_length
-                    
-                    while remaining > 0:
-                        chunk = client_socket.recv(min(1024, remaining))
-                        if not chunk:
-                            raise ConnectionError("Connection closed while receiving board data")
-                        board_data += chunk
-                        remaining -= len(chunk)
-                    
-                    # Unpickle the board data
-                    try:
-                        board = pickle.loads(board_data)
-                        message_queue.append("board_updated")
-                    except Exception as e:
-                        print(f"Error unpickling board: {e}")
-                
-                elif message == "opponent_joined":
-                    waiting_for_opponent = False
-                    message_queue.append(message)
-                
-                elif message == "opponent_disconnected":
-                    opponent_disconnected = True
-                    message_queue.append(message)
-                
-                elif message.startswith("game_over:") or message.startswith("error:"):
-                    message_queue.append(message)
-                
-            except UnicodeDecodeError:
-                # If we get here, it might be binary data that we failed to decode
-                print("Received binary data that couldn't be decoded as UTF-8")
-            
+            msg_type, payload = frame
+
+            # Handle board update messages: a full board or just the last move
+            if msg_type in (protocol.MSG_BOARD, protocol.MSG_MOVE):
+                try:
+                    if msg_type == protocol.MSG_BOARD:
+                        board = protocol.decode_board(payload)
+                    else:
+                        board = protocol.apply_move(board, payload)
+                    message_queue.append("board_updated")
+                    render.wake()
+                except protocol.ProtocolError as e:
+                    print(f"Error decoding board: {e}")
+                continue
+
+            message = str(payload, 'utf-8')
+
+            if message.startswith("token:"):
+                resume_token = message.split(":", 1)[1]
+
+            elif message == "opponent_joined":
+                waiting_for_opponent = False
+                message_queue.append(message)
+
+            elif message.startswith("opponent_away:"):
+                message_queue.append("opponent_away")
+
+            elif message == "opponent_disconnected" or message == "error:resume_failed":
+                resume_token = None
+                opponent_disconnected = True
+                message_queue.append("opponent_disconnected")
+
+            elif message.startswith("game_over:") or message.startswith("error:"):
+                message_queue.append(message)
+
+            render.wake()
+
         except Exception as e:
             print(f"Error receiving message: {e}")
+            if resume_token and not ttt.terminal(board) and resume_session():
+                reader = protocol.FrameReader(client_socket)
+                continue
             break
     
     print("Disconnected from server")
     if client_socket:
         client_socket.close()
         client_socket = None
+    render.wake()
 
 def process_messages():
     """Process any messages in the queue"""
-    global board, network_turn, message_queue, game_mode, waiting_for_opponent, opponent_disconnected
+    global board, network_turn, message_queue, game_mode, waiting_for_opponent, opponent_disconnected, opponent_away
     
     if not message_queue:
         return
@@ -145,9 +184,14 @@ def process_messages():
             network_turn = False
             
         elif message == "opponent_joined":
+            # Also sent when an opponent who dropped has resumed
             waiting_for_opponent = False
+            opponent_away = False
             network_turn = False
             
+        elif message == "opponent_away":
+            opponent_away = True
+            
         elif message == "opponent_disconnected":
             opponent_disconnected = True
             
@@ -165,7 +209,7 @@ def send_move(i, j):
     """Send a move to the server"""
     if client_socket:
         try:
-            client_socket.send(f"move:{i},{j}".encode('utf-8'))
+            protocol.send_text(client_socket, f"move:{i},{j}")
             return True
         except:
             return False
@@ -173,18 +217,25 @@ def send_move(i, j):
 
 def reset_game():
     """Reset the game state"""
-    global user, board, ai_turn, game_mode, client_socket, game_id, player_symbol, network_turn, waiting_for_opponent, opponent_disconnected
+    global user, board, ai_move, game_mode, client_socket, game_id, player_symbol, network_turn, waiting_for_opponent, opponent_disconnected, opponent_away, resume_token
+    resume_token = None  # First, so the listener does not reconnect when the socket closes
     user = None
     board = ttt.initial_state()
-    ai_turn = False
+    if ai_move:
+        ai_move.cancel()  # Drop a search still running for the old game
+    ai_move = None
     game_mode = None
     game_id = None
     player_symbol = None
     network_turn = False
     waiting_for_opponent = False
     opponent_disconnected = False
+    opponent_away = False
     if client_socket:
         try:
+            # Tell the server we quit, so it does not hold our seat for a resume
+            protocol.send_text(client_socket, "leave")
+            client_socket.shutdown(socket.SHUT_RDWR)
             client_socket.close()
         except:
             pass
@@ -194,9 +245,11 @@ def get_game_id_input():
     """Show an input field for game ID"""
     input_text = ""
     input_active = True
+    ui.discard()  # The menu frame this was called from
     
     while True:
-        for event in pygame.event.get():
+        events = ui.events()
+        for event in events:
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -206,95 +259,57 @@ def get_game_id_input():
                 elif event.key == pygame.K_BACKSPACE:
                     input_text = input_text[:-1]
                 else:
-                    if event.unicode.isdigit():
+                    # Worker servers hand out IDs like 1-3
+                    if event.unicode.isdigit() or event.unicode == '-':
                         input_text += event.unicode
         
-        screen.fill(black)
-        
         # Draw title
-        title = largeFont.render("Enter Game ID", True, white)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
+        ui.text(largeFont, "Enter Game ID", white, ((width / 2), 50))
         
         # Draw input box
-        input_box = pygame.Rect(width/4, height/2, width/2, 50)
-        pygame.draw.rect(screen, white, input_box, 2)
+        input_box = ui.rect(white, (width/4, height/2, width/2, 50), 2)
         
         # Render input text
-        text_surface = mediumFont.render(input_text, True, white)
-        text_rect = text_surface.get_rect()
-        text_rect.center = input_box.center
-        screen.blit(text_surface, text_rect)
+        if input_text:
+            ui.text(mediumFont, input_text, white, input_box.center)
         
         # Draw submit button
-        submit_button = pygame.Rect(width/3, 3*height/4, width/3, 50)
-        pygame.draw.rect(screen, white, submit_button)
-        submit_text = mediumFont.render("Join", True, black)
-        submit_text_rect = submit_text.get_rect()
-        submit_text_rect.center = submit_button.center
-        screen.blit(submit_text, submit_text_rect)
+        submit_button = ui.button((width/3, 3*height/4, width/3, 50), mediumFont, "Join")
         
         # Check if button is clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if submit_button.collidepoint(mouse):
-                time.sleep(0.2)
-                return input_text
+        mouse = render.clicked(events)
+        if mouse and submit_button.collidepoint(mouse):
+            return input_text
         
-        pygame.display.flip()
+        ui.present()
 
 # Main game loop
 while True:
-    for event in pygame.event.get():
+    # Sleeps until there is input, a server message or the computer's move
+    events = ui.events()
+    for event in events:
         if event.type == pygame.QUIT:
-            if client_socket:
-                client_socket.close()
+            # Says leave, so the opponent is not kept waiting for a resume
+            reset_game()
             sys.exit()
-
-    screen.fill(black)
+    mouse = render.clicked(events)
 
     # Let user choose a game mode if not chosen
     if game_mode is None:
         # Draw title
-        title = largeFont.render("Tic-Tac-Toe", True, white)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
+        ui.text(largeFont, "Tic-Tac-Toe", white, ((width / 2), 50))
 
         # Draw buttons for game modes
-        aiButton = pygame.Rect((width / 8), (height / 2) - 60, width / 4, 50)
-        aiText = mediumFont.render("Play vs AI", True, black)
-        aiTextRect = aiText.get_rect()
-        aiTextRect.center = aiButton.center
-        pygame.draw.rect(screen, white, aiButton)
-        screen.blit(aiText, aiTextRect)
-
-        hostButton = pygame.Rect(5 * (width / 8), (height / 2) - 60, width / 4, 50)
-        hostText = mediumFont.render("Host Game", True, black)
-        hostTextRect = hostText.get_rect()
-        hostTextRect.center = hostButton.center
-        pygame.draw.rect(screen, white, hostButton)
-        screen.blit(hostText, hostTextRect)
-
-        joinButton = pygame.Rect((width / 3), (height / 2) + 20, width / 3, 50)
-        joinText = mediumFont.render("Join Game", True, black)
-        joinTextRect = joinText.get_rect()
-        joinTextRect.center = joinButton.center
-        pygame.draw.rect(screen, white, joinButton)
-        screen.blit(joinText, joinTextRect)
+        aiButton = ui.button(((width / 8), (height / 2) - 60, width / 4, 50), mediumFont, "Play vs AI")
+        hostButton = ui.button((5 * (width / 8), (height / 2) - 60, width / 4, 50), mediumFont, "Host Game")
+        joinButton = ui.button(((width / 3), (height / 2) + 20, width / 3, 50), mediumFont, "Join Game")
 
         # Check if button is clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
+        if mouse:
             if aiButton.collidepoint(mouse):
-                time.sleep(0.2)
                 game_mode = "ai"
                 user = None  # Let user choose X or O as in original game
             elif hostButton.collidepoint(mouse):
-                time.sleep(0.2)
                 if connect_to_server():
                     if create_game():
                         game_mode = "network"
@@ -302,7 +317,6 @@ while True:
                         # Start listening for messages
                         threading.Thread(target=listen_for_messages, daemon=True).start()
             elif joinButton.collidepoint(mouse):
-                time.sleep(0.2)
                 game_id_to_join = get_game_id_input()
                 if game_id_to_join and connect_to_server():
                     if join_game(game_id_to_join):
@@ -315,35 +329,17 @@ while True:
     elif game_mode == "ai" and user is None:
         # Let user choose a player.
         # Draw title
-        title = largeFont.render("Play Tic-Tac-Toe", True, white)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
+        ui.text(largeFont, "Play Tic-Tac-Toe", white, ((width / 2), 50))
 
         # Draw buttons
-        playXButton = pygame.Rect((width / 8), (height / 2), width / 4, 50)
-        playX = mediumFont.render("Play as X", True, black)
-        playXRect = playX.get_rect()
-        playXRect.center = playXButton.center
-        pygame.draw.rect(screen, white, playXButton)
-        screen.blit(playX, playXRect)
-
-        playOButton = pygame.Rect(5 * (width / 8), (height / 2), width / 4, 50)
-        playO = mediumFont.render("Play as O", True, black)
-        playORect = playO.get_rect()
-        playORect.center = playOButton.center
-        pygame.draw.rect(screen, white, playOButton)
-        screen.blit(playO, playORect)
+        playXButton = ui.button(((width / 8), (height / 2), width / 4, 50), mediumFont, "Play as X")
+        playOButton = ui.button((5 * (width / 8), (height / 2), width / 4, 50), mediumFont, "Play as O")
 
         # Check if button is clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
+        if mouse:
             if playXButton.collidepoint(mouse):
-                time.sleep(0.2)
                 user = ttt.X
             elif playOButton.collidepoint(mouse):
-                time.sleep(0.2)
                 user = ttt.O
 
     # Network game waiting for opponent
@@ -352,36 +348,18 @@ while True:
         process_messages()
         
         # Draw waiting message
-        title = largeFont.render(f"Game ID: {game_id}", True, white)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
-        
-        waiting = mediumFont.render("Waiting for opponent...", True, white)
-        waitingRect = waiting.get_rect()
-        waitingRect.center = ((width / 2), height / 2)
-        screen.blit(waiting, waitingRect)
+        ui.text(largeFont, f"Game ID: {game_id}", white, ((width / 2), 50))
+        ui.text(mediumFont, "Waiting for opponent...", white, ((width / 2), height / 2))
     
     # Check if opponent disconnected
     elif game_mode == "network" and opponent_disconnected:
-        title = largeFont.render("Opponent Disconnected", True, white)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
+        ui.text(largeFont, "Opponent Disconnected", white, ((width / 2), 50))
         
         # Back button
-        backButton = pygame.Rect((width / 3), (height / 2) + 20, width / 3, 50)
-        backText = mediumFont.render("Back to Menu", True, black)
-        backTextRect = backText.get_rect()
-        backTextRect.center = backButton.center
-        pygame.draw.rect(screen, white, backButton)
-        screen.blit(backText, backTextRect)
+        backButton = ui.button(((width / 3), (height / 2) + 20, width / 3, 50), mediumFont, "Back to Menu")
         
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
+        if mouse:
             if backButton.collidepoint(mouse):
-                time.sleep(0.2)
                 reset_game()
                 
     # Game play (both AI and network)
@@ -398,31 +376,34 @@ while True:
         for i in range(3):
             row = []
             for j in range(3):
-                rect = pygame.Rect(
+                rect = ui.rect(white, (
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
                     tile_size, tile_size
-                )
-                pygame.draw.rect(screen, white, rect, 3)
+                ), 3)
 
                 if board[i][j] != ttt.EMPTY:
-                    move = moveFont.render(board[i][j], True, white)
-                    moveRect = move.get_rect()
-                    moveRect.center = rect.center
-                    screen.blit(move, moveRect)
+                    ui.text(moveFont, board[i][j], white, rect.center)
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        # Every change (listener, AI, a click) assigns a new board, so it
+        # is only rescanned when it was replaced, not on every frame
+        if board_state is None or board_state_of is not board:
+            board_state_of = board
+            board_state = ttt.GameState.from_board(board)
+        game_over = board_state.terminal()
+        player = board_state.player()
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = board_state.winner
             if winner is None:
                 title = f"Game Over: Tie."
             else:
                 title = f"Game Over: {winner} wins."
+        elif game_mode == "network" and opponent_away:
+            title = "Opponent reconnecting..."
         elif (game_mode == "ai" and user == player) or \
              (game_mode == "network" and player_symbol == player and not network_turn):
             title = f"Play as {user}"
@@ -431,34 +412,25 @@ while True:
         else:
             title = f"Computer thinking..."
             
-        title = largeFont.render(title, True, white)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 30)
-        screen.blit(title, titleRect)
+        ui.text(largeFont, title, white, ((width / 2), 30))
 
         # Show game ID if in network mode
         if game_mode == "network" and game_id:
-            id_text = mediumFont.render(f"Game ID: {game_id}", True, white)
-            id_rect = id_text.get_rect()
-            id_rect.center = ((width / 2), height - 30)
-            screen.blit(id_text, id_rect)
+            ui.text(mediumFont, f"Game ID: {game_id}", white, ((width / 2), height - 30))
 
         # Check for AI move
         if game_mode == "ai" and user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = ai.request_move(board, lambda action: render.wake())
+            elif ai_move.done.is_set():
+                board = ttt.result(board, ai_move.action)
+                ai_move = None
+                ui.again()
 
         # Check for a user move
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1 and not game_over:
+        if mouse and not game_over:
             if (game_mode == "ai" and user == player) or \
                (game_mode == "network" and player_symbol == player and not network_turn):
-                mouse = pygame.mouse.get_pos()
                 for i in range(3):
                     for j in range(3):
                         if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
@@ -471,17 +443,10 @@ while True:
                                 board = ttt.result(board, (i, j))
 
         if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
+            againButton = ui.button((width / 3, height - 65, width / 3, 50), mediumFont, "Play Again")
+            if mouse:
                 if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
                     reset_game()
 
-    pygame.display.flip()
\ No newline at end of file
+    # Repaints only what changed since the last frame
+    ui.present()
\ No newline at end of file
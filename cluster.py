@@ -0,0 +1,195 @@
+"""
+Game-ID-sharded cluster of TicTacToe servers
+
+Several TicTacToeServer nodes, on one box or many, share a consistent hash
+ring of their addresses. Every game ID hashes to exactly one owning node,
+and a node only hands out IDs that hash to itself, so a game ID alone says
+where the game lives. No registry needs to be shared.
+
+A node that receives join:<id> or watch:<id> for a game it does not own
+relays the connection to the owner. quick_match is sent to the owner of its
+rating bucket, so players who could be paired meet on one node. The front
+door is a thin relay in front of the nodes: new games go round-robin,
+everything else to the owner.
+
+    python cluster.py node --listen 127.0.0.1:9001 --nodes 127.0.0.1:9001,127.0.0.1:9002
+    python cluster.py node --listen 127.0.0.1:9002 --nodes 127.0.0.1:9001,127.0.0.1:9002
+    python cluster.py front --listen 0.0.0.0:8000 --nodes 127.0.0.1:9001,127.0.0.1:9002
+"""
+
+import argparse
+import bisect
+import hashlib
+import itertools
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+
+import protocol
+from games import GameRegistry
+from proxy import connect_upstream, splice
+from server import TicTacToeServer
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(':')
+    return (host, int(port))
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to node names ('host:port')"""
+
+    def __init__(self, nodes, replicas=100):
+        self.nodes = list(nodes)
+        # Each node is placed many times so keys spread evenly
+        points = sorted((self._hash(f"{node}#{n}"), node) for node in self.nodes for n in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+    def owner(self, key):
+        """Return the node that owns key"""
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+
+def request_key(request, bucket_width=100):
+    """
+    Returns the ring key a first request is routed by, or None if any node
+    can serve it.
+    """
+    kind, _, argument = request.partition(':')
+    if kind in ('join', 'watch'):
+        return argument
+    if kind == 'resume':
+        # Tokens start with the game ID: <id>.<random>
+        return argument.partition('.')[0]
+    if kind == 'quick_match':
+        # Same buckets as MatchQueue, so every player in a bucket lands on one node
+        bucket = int(argument) // bucket_width if argument.isdigit() else None
+        return f"quick_match:{bucket}"
+    return None
+
+
+class ClusterRegistry(GameRegistry):
+    """GameRegistry that only hands out IDs owned by this node"""
+
+    def __init__(self, ring, node):
+        super().__init__()
+        self.ring = ring
+        self.node = node
+
+    def new_id(self):
+        # Skips the IDs owned by other nodes; about one in len(nodes) is ours
+        while True:
+            game_id = super().new_id()
+            if self.ring.owner(game_id) == self.node:
+                return game_id
+
+
+class ClusterNode(TicTacToeServer):
+    def __init__(self, host, port, nodes):
+        super().__init__(host, port)
+        self.node = f"{host}:{port}"
+        self.ring = HashRing(nodes)
+        if self.node not in self.ring.nodes:
+            raise ValueError(f"{self.node} is not one of the cluster nodes {nodes}")
+        self.games = ClusterRegistry(self.ring, self.node)
+
+    def route(self, request):
+        key = request_key(request, self.matches.bucket_width)
+        if key is None:
+            return None
+        owner = self.ring.owner(key)
+        return None if owner == self.node else parse_address(owner)
+
+
+class FrontDoor:
+    """Relays each client to the node that should serve its first request"""
+
+    def __init__(self, host, port, nodes):
+        self.host = host
+        self.port = port
+        self.ring = HashRing(nodes)
+        self.next_node = itertools.cycle(self.ring.nodes)  # For requests any node can serve
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server_socket.bind((self.host, self.port))
+
+    def start(self):
+        self.server_socket.listen(1024)
+        print(f"[FRONT] Relaying {self.host}:{self.port} to {', '.join(self.ring.nodes)}")
+        try:
+            while True:
+                client_socket, address = self.server_socket.accept()
+                client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                threading.Thread(target=self.handle_client, args=(client_socket, address), daemon=True).start()
+        except KeyboardInterrupt:
+            print("[FRONT] Shutting down...")
+        finally:
+            self.server_socket.close()
+
+    def handle_client(self, client_socket, address):
+        try:
+            frame = protocol.recv_frame(client_socket)
+            if frame is None:
+                return
+            key = request_key(frame[1].decode('utf-8'))
+            node = self.ring.owner(key) if key is not None else next(self.next_node)
+            try:
+                server = connect_upstream(parse_address(node), protocol.encode_frame(*frame))
+            except OSError as e:
+                print(f"[FRONT] Cannot reach {node} for {address}: {e}")
+                protocol.send_text(client_socket, "error:server_unavailable")
+                return
+            try:
+                splice(client_socket, server)
+            finally:
+                server.close()
+        except Exception as e:
+            print(f"[ERROR] Error relaying {address}: {e}")
+        finally:
+            client_socket.close()
+
+
+def _run(role, listen, nodes, quiet):
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+    host, port = listen
+    if role == 'front':
+        FrontDoor(host, port, nodes).start()
+    else:
+        ClusterNode(host, port, nodes).start()
+
+
+def start_cluster(host='127.0.0.1', port=9000, nodes=2, quiet=True):
+    """
+    Start a front door on port and nodes on port + 1 ... port + nodes, each in
+    its own process. Returns the processes.
+    """
+    names = [f"{host}:{port + n}" for n in range(1, nodes + 1)]
+    processes = [multiprocessing.Process(target=_run, args=('node', parse_address(name), names, quiet), daemon=True)
+                 for name in names]
+    processes.append(multiprocessing.Process(target=_run, args=('front', (host, port), names, quiet), daemon=True))
+    for process in processes:
+        process.start()
+    return processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('role', choices=('node', 'front'))
+    parser.add_argument('--listen', required=True, help="host:port to serve on")
+    parser.add_argument('--nodes', required=True, help="comma-separated host:port of every node")
+    parser.add_argument('--quiet', action='store_true', help="silence the per-move logging")
+    args = parser.parse_args()
+    _run(args.role, parse_address(args.listen), args.nodes.split(','), args.quiet)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Game registry for TicTacToeServer
+
+Each game carries its own lock, so a move in one game never waits on a move
+in another. The registry itself is split into lock-striped shards: looking a
+game up, adding it or removing it only locks the shard the game ID hashes to.
+"""
+
+import itertools
+import threading
+
+import tictactoe as ttt
+
+
+class Game:
+    """A game in progress and the connections playing it"""
+
+    def __init__(self, game_id, player1, player2=None, state=None):
+        self.game_id = game_id
+        self.state = state if state is not None else ttt.GameState()  # Updated in place by push()
+        self.player1 = player1
+        self.player2 = player2
+        self.bot = None  # Symbol played by the server-side AI, if any
+        self.spectators = []  # Outboxes of watch:<id> connections
+        self.active = True  # Cleared under self.lock when the game is removed
+        self.recovered = False  # Restored from the move log; players rejoin into empty slots
+        self.tokens = {}  # Player slot (1 or 2) -> resume token
+        self.away = {}  # Player slot -> Timer ending the game unless the player resumes
+        self.lock = threading.Lock()
+
+    def players(self):
+        """Return the connected players, player 1 first"""
+        return [p for p in (self.player1, self.player2) if p is not None]
+
+
+class GameRegistry:
+    """Maps game IDs to Game objects across lock-striped shards"""
+
+    def __init__(self, shards=64, id_prefix=''):
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self._ids = itertools.count(1)
+        self.id_prefix = id_prefix  # Marks IDs with the process that owns the game, e.g. '2-'
+
+    def new_id(self):
+        """Return a game ID that has never been handed out before"""
+        # next() on a count is a single C call, so threads never get the same number
+        return f"{self.id_prefix}{next(self._ids)}"
+
+    def reserve(self, game_ids):
+        """Make sure new_id() never returns any of game_ids (e.g. from an earlier run)"""
+        numbers = [int(game_id[len(self.id_prefix):]) for game_id in game_ids
+                   if game_id.startswith(self.id_prefix) and game_id[len(self.id_prefix):].isdigit()]
+        if numbers:
+            # Called before the server accepts connections, so nothing races the swap
+            self._ids = itertools.count(max(numbers) + 1)
+
+    def _shard(self, game_id):
+        return self._shards[hash(game_id) % len(self._shards)]
+
+    def add(self, game):
+        games, lock = self._shard(game.game_id)
+        with lock:
+            games[game.game_id] = game
+        return game
+
+    def get(self, game_id):
+        """Return the game with this ID, or None"""
+        games, lock = self._shard(game_id)
+        with lock:
+            return games.get(game_id)
+
+    def remove(self, game_id):
+        """Remove and return the game with this ID, or None"""
+        games, lock = self._shard(game_id)
+        with lock:
+            return games.pop(game_id, None)
+
+    def __contains__(self, game_id):
+        return self.get(game_id) is not None
+
+    def __len__(self):
+        total = 0
+        for games, lock in self._shards:
+            with lock:
+                total += len(games)
+        return total
+
+    def all(self):
+        """Return a snapshot list of every game"""
+        result = []
+        for games, lock in self._shards:
+            with lock:
+                result.extend(games.values())
+        return result
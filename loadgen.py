@@ -0,0 +1,211 @@
+"""
+Headless load generator for the TicTacToe servers
+
+Opens many simulated players with netclient.AsyncGameClient, pairs them
+through new / join:<id> (or the quick_match queue with --quick-match, or
+plays them against the server AI with --ai) and plays every game to the
+end. Reports games/sec, moves/sec, connection setup time and move latency
+percentiles, plus the time players spent waiting for a match.
+
+    python loadgen.py --host 127.0.0.1 --port 8000 --games 1000 --concurrency 200
+    python loadgen.py --spawn-server async --games 2000 --strategy minimax
+    python loadgen.py --spawn-server threaded --ai --games 200
+    python loadgen.py --spawn-server async --quick-match --games 5000 --concurrency 500
+    python loadgen.py --spawn-server workers --workers 4 --games 2000
+
+Move latency is the time from sending a move to receiving the server's
+update for it.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import tictactoe as ttt
+from async_server import raise_fd_limit
+from benchmarks.common import percentile, start_server, stop_server, wait_for_port
+from netclient import AsyncGameClient
+from workers import start_workers
+
+
+def choose_move(board, strategy, rng):
+    if strategy == 'minimax':
+        return ttt.minimax(board)
+    return rng.choice(sorted(ttt.actions(board)))
+
+
+class Stats:
+    def __init__(self):
+        self.connect_times = []
+        self.latencies = []
+        self.match_waits = []
+        self.games = 0
+        self.moves = 0
+        self.errors = 0
+
+
+async def open_client(host, port, stats):
+    client = AsyncGameClient(host, port)
+    start = time.perf_counter()
+    await client.connect()
+    stats.connect_times.append(time.perf_counter() - start)
+    return client
+
+
+async def play(client, strategy, rng, stats):
+    """Play moves for client until its game is over"""
+    while client.result is None:
+        if client.my_turn():
+            action = choose_move(client.board, strategy, rng)
+            sent = time.perf_counter()
+            await client.send_move(action)
+            while True:
+                kind, message = await client.next_event()
+                if kind == 'move' and message[0] == action:
+                    stats.latencies.append(time.perf_counter() - sent)
+                    stats.moves += 1
+                    break
+                if kind == 'text' and message.startswith('error:'):
+                    raise RuntimeError(f"move {action} rejected: {message}")
+        else:
+            kind, message = await client.next_event()
+            # The threaded server holds a dropped player's seat for a resume
+            # first; a simulated game fails at once rather than wait it out
+            if kind == 'text' and message.split(':')[0] in ('opponent_disconnected', 'opponent_away'):
+                raise ConnectionError("opponent disconnected")
+
+
+async def play_pair(host, port, strategy, rng, stats):
+    """Pair two fresh players through new / join and play one game"""
+    x = await open_client(host, port, stats)
+    o = await open_client(host, port, stats)
+    try:
+        game_id = await x.create_game()
+        if game_id is None or not await o.join_game(game_id):
+            raise RuntimeError(f"could not pair players for game {game_id}")
+        await x.next_event()  # opponent_joined
+        await asyncio.gather(play(x, strategy, rng, stats), play(o, strategy, rng, stats))
+    finally:
+        x.close()
+        o.close()
+
+
+async def play_quick_match(host, port, strategy, rng, stats, rating=None):
+    """Play one game as a player matched through the quick_match queue"""
+    client = await open_client(host, port, stats)
+    try:
+        start = time.perf_counter()
+        if await client.quick_match(rating) is None:
+            raise RuntimeError("quick_match refused")
+        if client.symbol == ttt.X:
+            await client.next_event()  # opponent_joined
+        stats.match_waits.append(time.perf_counter() - start)
+        await play(client, strategy, rng, stats)
+    finally:
+        client.close()
+
+
+async def play_ai(host, port, strategy, rng, stats):
+    """Play one game against the server AI, as X or O at random"""
+    client = await open_client(host, port, stats)
+    try:
+        symbol = rng.choice((ttt.X, ttt.O))
+        if await client.new_ai_game(symbol) is None:
+            raise RuntimeError("server refused the AI game")
+        if symbol == ttt.X:
+            await client.next_event()  # opponent_joined
+        await play(client, strategy, rng, stats)
+    finally:
+        client.close()
+
+
+async def run(args):
+    stats = Stats()
+    rng = random.Random(args.seed)
+    gate = asyncio.Semaphore(args.concurrency)
+    game = play_ai if args.ai else play_pair
+
+    async def one():
+        async with gate:
+            try:
+                await asyncio.wait_for(game(args.host, args.port, args.strategy, rng, stats), args.timeout)
+                stats.games += 1
+            except (OSError, ConnectionError, RuntimeError, asyncio.TimeoutError) as e:
+                stats.errors += 1
+                if stats.errors <= 5:
+                    print(f"[LOADGEN] Game failed: {e!r}")
+
+    async def matched_player(rating):
+        # Two players per game; each seat counts half a game
+        async with gate:
+            try:
+                await asyncio.wait_for(play_quick_match(args.host, args.port, args.strategy, rng, stats, rating),
+                                       args.timeout)
+                stats.games += 0.5
+            except (OSError, ConnectionError, RuntimeError, asyncio.TimeoutError) as e:
+                stats.errors += 0.5
+                if stats.errors <= 5:
+                    print(f"[LOADGEN] Player failed: {e!r}")
+
+    start = time.perf_counter()
+    if args.quick_match:
+        # Ratings come in pairs so no bucket is left with a player nobody can meet
+        ratings = [rng.randrange(1000, 1000 + args.rating_spread) if args.rating_spread else None
+                   for _ in range(args.games)]
+        await asyncio.gather(*(matched_player(rating) for rating in ratings for _ in range(2)))
+    else:
+        await asyncio.gather(*(one() for _ in range(args.games)))
+    return stats, time.perf_counter() - start
+
+
+def report(stats, elapsed):
+    def ms(values, p):
+        return percentile(values, p) * 1000
+
+    print(f"games: {stats.games:g} ok, {stats.errors:g} failed in {elapsed:.2f}s")
+    print(f"throughput: {stats.games / elapsed:.1f} games/s, {stats.moves / elapsed:.1f} moves/s")
+    rows = [("connect", stats.connect_times), ("move", stats.latencies)]
+    if stats.match_waits:
+        rows.append(("match", stats.match_waits))
+    for name, values in rows:
+        print(f"{name + ' ms':<12} p50 {ms(values, 50):7.3f}  p90 {ms(values, 90):7.3f}  "
+              f"p99 {ms(values, 99):7.3f}  max {ms(values, 100):7.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--games', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=100, help="games in flight at once")
+    parser.add_argument('--strategy', choices=('random', 'minimax'), default='random')
+    parser.add_argument('--ai', action='store_true', help="play against the server AI (threaded server only)")
+    parser.add_argument('--quick-match', action='store_true', help="pair players through the quick_match queue")
+    parser.add_argument('--rating-spread', type=int, default=0,
+                        help="with --quick-match, give players random ratings over this range")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds allowed per game")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--spawn-server', choices=('threaded', 'async', 'workers'),
+                        help="start a local server on --host/--port for the run")
+    parser.add_argument('--workers', type=int, default=2, help="worker processes for --spawn-server workers")
+    args = parser.parse_args()
+
+    raise_fd_limit()
+
+    servers = []
+    if args.spawn_server == 'workers':
+        servers = start_workers(args.host, args.port, args.workers, quiet=True)
+        wait_for_port(args.host, args.port)
+    elif args.spawn_server:
+        servers = [start_server(args.spawn_server, args.host, args.port)]
+    try:
+        stats, elapsed = asyncio.run(run(args))
+        report(stats, elapsed)
+    finally:
+        for server in servers:
+            stop_server(server)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Matchmaking queue for quick_match
+
+Waiting players are kept in FIFO queues, one per rating bucket, so pairing
+a newcomer is a popleft from one deque: O(1) however many players wait.
+Players who give up while waiting are not searched for and removed; their
+entries are skipped when they reach the front of the queue.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class MatchQueue:
+    def __init__(self, bucket_width=None, history=10000):
+        self.bucket_width = bucket_width  # Ratings per bucket; None pairs everyone together
+        self.buckets = {}  # bucket -> deque of (item, enqueued_at)
+        self.waits = deque(maxlen=history)  # Recent queue wait times in seconds
+        self.pairs = 0
+        self.lock = threading.Lock()
+
+    def bucket(self, rating):
+        """Return the bucket a rating falls in"""
+        if rating is None or not self.bucket_width:
+            return None
+        return int(rating) // self.bucket_width
+
+    def match(self, item, rating=None, alive=None):
+        """
+        Pair item with the longest-waiting entry in its rating bucket, or
+        queue it if nobody is waiting. Entries for which alive(entry) is
+        False are dropped on the way. Returns (opponent, seconds_waited), or
+        None when item was queued.
+        """
+        key = self.bucket(rating)
+        with self.lock:
+            waiting = self.buckets.get(key)
+            while waiting:
+                opponent, enqueued_at = waiting.popleft()
+                if alive is None or alive(opponent):
+                    if not waiting:
+                        del self.buckets[key]
+                    return opponent, time.monotonic() - enqueued_at
+            if waiting is None:
+                waiting = self.buckets[key] = deque()
+            waiting.append((item, time.monotonic()))
+            return None
+
+    def record(self, waited):
+        """Count a completed pairing and its queue wait"""
+        with self.lock:
+            self.pairs += 1
+            self.waits.append(waited)
+
+    def __len__(self):
+        """Number of queued entries, including ones that have since left"""
+        with self.lock:
+            return sum(len(waiting) for waiting in self.buckets.values())
@@ -0,0 +1,235 @@
+"""
+Write-ahead move log for TicTacToeServer
+
+Every game created, move played and game ended is appended to a log file
+as one short text line before the server tells anyone about it:
+
+    N <game_id> <bot symbol or ->     a game was created
+    M <game_id> <ply> <cell>           move number ply was played at cell (0-8)
+    T <game_id> <slot> <token>         player slot (1 or 2) was given a resume token
+    E <game_id>                        the game is over or abandoned
+    I <game_id>                        an ID that was handed out (snapshots only)
+
+How soon an appended record is on disk depends on the fsync policy:
+    always    fsync after every record, the caller waits for it
+    group     a flusher thread fsyncs whatever has been written since its
+              last fsync; callers wait, so concurrent moves share one fsync
+    interval  the flusher fsyncs every `interval` seconds; callers do not
+              wait, so a crash can lose the last interval of moves
+
+Every snapshot_every records the log is compacted. A snapshot file with
+just the games in progress replaces it, and the log starts again empty.
+Replaying is idempotent (a move is only applied at its own ply, and
+records for unknown or known games are skipped as needed), so a crash
+at any point during compaction loses nothing.
+"""
+
+import os
+import threading
+
+POLICIES = ('always', 'group', 'interval')
+
+
+class MoveLog:
+    def __init__(self, path, fsync='group', interval=0.05, snapshot_every=10000, snapshot_source=None):
+        if fsync not in POLICIES:
+            raise ValueError(f"fsync policy must be one of {POLICIES}, got {fsync}")
+        self.path = path
+        self.snapshot_path = path + '.snapshot'
+        self.policy = fsync
+        self.interval = interval
+        self.snapshot_every = snapshot_every
+        # Returns (an ID just handed out, [(game_id, bot, cells, tokens), ...] for every game in progress)
+        self.snapshot_source = snapshot_source
+        self.file = open(path, 'ab')
+        self.cond = threading.Condition()
+        self.written = 0  # Records appended
+        self.synced = 0   # Records known to be on disk
+        self.since_snapshot = 0
+        self.fsyncs = 0
+        self.snapshots = 0
+        self.closed = False
+        self.flushing = False  # The flusher is in fsync() on self.file outside the lock
+        self.flusher = None
+        if fsync != 'always':
+            self.flusher = threading.Thread(target=self._flush_loop, name="movelog-flush", daemon=True)
+            self.flusher.start()
+
+    # Records
+
+    def new_game(self, game_id, bot=None):
+        self.append(f"N {game_id} {bot or '-'}\n")
+
+    def move(self, game_id, ply, action):
+        self.append(f"M {game_id} {ply} {action[0] * 3 + action[1]}\n")
+
+    def token(self, game_id, slot, token):
+        self.append(f"T {game_id} {slot} {token}\n")
+
+    def end_game(self, game_id):
+        self.append(f"E {game_id}\n")
+
+    def append(self, record):
+        """
+        Append one record. Returns once it is on disk, except under the
+        interval policy.
+        """
+        data = record.encode('utf-8')
+        with self.cond:
+            if self.closed:
+                return
+            self.file.write(data)
+            self.written += 1
+            seq = self.written
+            self.since_snapshot += 1
+            if self.snapshot_source is not None and self.since_snapshot >= self.snapshot_every:
+                self._snapshot()
+            if self.policy == 'always':
+                if self.synced < seq:
+                    self._sync()
+                    self.synced = seq
+            elif self.policy == 'group':
+                self.cond.notify_all()
+                while self.synced < seq and not self.closed:
+                    self.cond.wait()
+
+    def _sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.fsyncs += 1
+
+    def _flush_loop(self):
+        while True:
+            with self.cond:
+                if self.policy == 'group':
+                    while self.synced == self.written and not self.closed:
+                        self.cond.wait()
+                else:
+                    self.cond.wait(self.interval)
+                if self.closed:
+                    return
+                if self.synced == self.written:
+                    continue
+                target = self.written
+                self.file.flush()
+                fd = self.file.fileno()
+                self.flushing = True
+            # Appends keep filling the buffer while the disk catches up
+            os.fsync(fd)
+            with self.cond:
+                self.flushing = False
+                self.fsyncs += 1
+                self.synced = max(self.synced, target)
+                self.cond.notify_all()
+
+    # Snapshots
+
+    def _snapshot(self):
+        """Replace the log with a snapshot of the games in progress; call with self.cond held"""
+        # The old file must not be closed under the flusher's fsync
+        while self.flushing:
+            self.cond.wait()
+        last_id, games = self.snapshot_source()
+        lines = [f"I {last_id}\n"]
+        for game_id, bot, cells, tokens in games:
+            lines.append(f"N {game_id} {bot or '-'}\n")
+            lines.extend(f"T {game_id} {slot} {token}\n" for slot, token in tokens.items())
+            lines.extend(f"M {game_id} {ply} {cell}\n" for ply, cell in enumerate(cells))
+        temp = self.snapshot_path + '.tmp'
+        with open(temp, 'wb') as f:
+            f.write(''.join(lines).encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.snapshot_path)
+        _fsync_dir(self.snapshot_path)
+        # Everything in the old log is covered by the snapshot now
+        self.file.close()
+        self.file = open(self.path, 'wb')
+        self.synced = self.written
+        self.since_snapshot = 0
+        self.snapshots += 1
+        self.cond.notify_all()
+
+    def snapshot(self):
+        """Compact the log now"""
+        with self.cond:
+            self._snapshot()
+
+    # Recovery
+
+    def recover(self):
+        """
+        Replay the snapshot and the log. Returns (games, ids): the games
+        still in progress as {game_id: (bot, [cells], {slot: token})} in
+        creation order, and every game ID the files mention, so none is
+        handed out again. Call before appending anything.
+        """
+        games = {}
+        ids = []
+        for path in (self.snapshot_path, self.path):
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            # The last piece has no newline: empty, or a record a crash cut short
+            lines = data.split(b'\n')
+            for line in lines[:-1]:
+                _replay(line, games, ids)
+            if path == self.path and lines[-1]:
+                self._truncate(len(data) - len(lines[-1]))
+        return games, ids
+
+    def _truncate(self, size):
+        """Cut a torn last record off the log, so the next record starts on its own line"""
+        with self.cond:
+            self.file.flush()
+            self.file.truncate(size)
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        with self.cond:
+            while self.flushing:
+                self.cond.wait()
+            if self.closed:
+                return
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.synced = self.written
+            self.closed = True
+            self.file.close()
+            self.cond.notify_all()
+
+
+def _replay(line, games, ids):
+    """Apply one record to games; malformed lines are skipped"""
+    try:
+        kind, game_id, *args = line.decode('utf-8').split()
+        numbers = [int(arg) for arg in args] if kind == 'M' else []
+        slot = int(args[0]) if kind == 'T' and args else None
+    except ValueError:
+        return
+    if kind == 'I':
+        ids.append(game_id)
+    elif kind == 'N' and len(args) == 1:
+        ids.append(game_id)
+        if game_id not in games:
+            games[game_id] = (None if args[0] == '-' else args[0], [], {})
+    elif kind == 'M' and len(args) == 2 and game_id in games:
+        cells = games[game_id][1]
+        ply, cell = numbers
+        if ply == len(cells) and 0 <= cell < 9 and cell not in cells:
+            cells.append(cell)
+    elif kind == 'T' and len(args) == 2 and game_id in games and slot in (1, 2):
+        games[game_id][2][slot] = args[1]
+    elif kind == 'E':
+        games.pop(game_id, None)
+
+
+def _fsync_dir(path):
+    """Make a rename in path's directory durable"""
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
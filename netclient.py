@@ -0,0 +1,212 @@
+"""
+Headless TicTacToe client library
+
+Speaks the server protocol without pygame, for scripts, bots and load
+tests. GameClient uses a blocking socket; AsyncGameClient does the same on
+asyncio streams so one process can drive thousands of players.
+
+Both keep the board up to date from the server's messages and hand every
+message back as an event:
+    ('move', ((i, j), symbol))   a move was played
+    ('board', board)             the server sent the whole board
+    ('text', message)            anything else, e.g. 'opponent_joined',
+                                 'game_over:tie', 'error:not_your_turn'
+Spectators (watch) get the same events; they start with a 'board' event.
+
+Players are also sent a resume token, kept in .token rather than returned
+as an event. After a dropped connection, connect() again and resume() to
+take the seat back; the server holds it for a grace period. leave() gives
+the seat up for good.
+"""
+
+import asyncio
+import socket
+
+import protocol
+import tictactoe as ttt
+
+
+class _ClientState:
+    """Board, side and game bookkeeping shared by both clients"""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.board = ttt.initial_state()
+        self.symbol = None
+        self.game_id = None
+        self.result = None  # 'tie' or 'winner:X' / 'winner:O' once the game is over
+        self.token = None  # Resume token for this player's seat
+
+    def _handle(self, msg_type, payload):
+        """Update the state from one frame and return it as an event"""
+        if msg_type == protocol.MSG_MOVE:
+            action, symbol = protocol.decode_move(payload)
+            self.board = protocol.apply_move(self.board, payload)
+            return ('move', (action, symbol))
+        if msg_type == protocol.MSG_BOARD:
+            self.board = protocol.decode_board(payload)
+            return ('board', self.board)
+        message = str(payload, 'utf-8')  # bytes, or a memoryview from FrameReader
+        if message.startswith('token:'):
+            self.token = message.split(':', 1)[1]
+            return None
+        if message.startswith('game_over:'):
+            self.result = message.split(':', 1)[1]
+        return ('text', message)
+
+    def _handle_reply(self, message, symbol):
+        """Handle the reply to new / new_ai / join / watch; returns True on success"""
+        kind, _, game_id = message.partition(':')
+        if kind == 'resumed':
+            # Back in a game after a reconnect or a server restart: resumed:<id>:<symbol>, then the board
+            self.game_id, _, self.symbol = game_id.partition(':')
+            return True
+        if kind not in ('new_game', 'joined', 'watching'):
+            return False
+        self.game_id = game_id
+        if kind != 'watching':
+            self.symbol = symbol or (ttt.X if kind == 'new_game' else ttt.O)
+        return True
+
+    def my_turn(self):
+        return self.result is None and not ttt.terminal(self.board) and ttt.player(self.board) == self.symbol
+
+
+class GameClient(_ClientState):
+    """Blocking client"""
+
+    def __init__(self, host='192.168.22.71', port=8000, timeout=None):
+        super().__init__(host, port)
+        self.timeout = timeout
+        self.sock = None
+        self.reader = None
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = protocol.FrameReader(self.sock)
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+
+    def _request(self, text, symbol=None):
+        protocol.send_text(self.sock, text)
+        kind, message = self.next_event()
+        return kind == 'text' and self._handle_reply(message, symbol)
+
+    def create_game(self):
+        """Create a game as X; returns the game ID or None"""
+        return self.game_id if self._request('new') else None
+
+    def join_game(self, game_id):
+        """Join a game as O; returns True on success"""
+        return self._request(f'join:{game_id}')
+
+    def new_ai_game(self, symbol=ttt.X):
+        """Start a game against the server AI; returns the game ID or None"""
+        request = 'new_ai:O' if symbol == ttt.O else 'new_ai'
+        return self.game_id if self._request(request, symbol) else None
+
+    def quick_match(self, rating=None):
+        """
+        Ask the server for an opponent; returns the game ID or None. Playing
+        X means waiting for 'opponent_joined' before the opponent is there.
+        """
+        request = 'quick_match' if rating is None else f'quick_match:{rating}'
+        return self.game_id if self._request(request) else None
+
+    def watch(self, game_id):
+        """Follow a game as a spectator; the next event is the current board"""
+        return self._request(f'watch:{game_id}')
+
+    def resume(self, token=None):
+        """Take back a seat on a new connection; the next event is the current board"""
+        return self._request(f'resume:{token or self.token}')
+
+    def send_move(self, action):
+        protocol.send_text(self.sock, f"move:{action[0]},{action[1]}")
+
+    def leave(self):
+        """Quit the game; the opponent is told at once instead of after the grace period"""
+        protocol.send_text(self.sock, "leave")
+
+    def next_event(self):
+        """Block for the next server message; raises ConnectionError on disconnect"""
+        event = None
+        while event is None:
+            frame = self.reader.read_frame()
+            if frame is None:
+                raise ConnectionError("Server closed the connection")
+            event = self._handle(*frame)
+        return event
+
+
+class AsyncGameClient(_ClientState):
+    """asyncio client"""
+
+    def __init__(self, host='192.168.22.71', port=8000):
+        super().__init__(host, port)
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def close(self):
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+    async def _request(self, text, symbol=None):
+        self.writer.write(protocol.encode_text(text))
+        kind, message = await self.next_event()
+        return kind == 'text' and self._handle_reply(message, symbol)
+
+    async def create_game(self):
+        """Create a game as X; returns the game ID or None"""
+        return self.game_id if await self._request('new') else None
+
+    async def join_game(self, game_id):
+        """Join a game as O; returns True on success"""
+        return await self._request(f'join:{game_id}')
+
+    async def new_ai_game(self, symbol=ttt.X):
+        """Start a game against the server AI; returns the game ID or None"""
+        request = 'new_ai:O' if symbol == ttt.O else 'new_ai'
+        return self.game_id if await self._request(request, symbol) else None
+
+    async def quick_match(self, rating=None):
+        """Ask the server for an opponent; returns the game ID or None"""
+        request = 'quick_match' if rating is None else f'quick_match:{rating}'
+        return self.game_id if await self._request(request) else None
+
+    async def watch(self, game_id):
+        """Follow a game as a spectator; the next event is the current board"""
+        return await self._request(f'watch:{game_id}')
+
+    async def resume(self, token=None):
+        """Take back a seat on a new connection; the next event is the current board"""
+        return await self._request(f'resume:{token or self.token}')
+
+    async def send_move(self, action):
+        self.writer.write(protocol.encode_text(f"move:{action[0]},{action[1]}"))
+        await self.writer.drain()
+
+    async def leave(self):
+        """Quit the game; the opponent is told at once instead of after the grace period"""
+        self.writer.write(protocol.encode_text("leave"))
+        await self.writer.drain()
+
+    async def next_event(self):
+        """Wait for the next server message; raises ConnectionError on disconnect"""
+        event = None
+        while event is None:
+            frame = await protocol.read_frame(self.reader)
+            if frame is None:
+                raise ConnectionError("Server closed the connection")
+            event = self._handle(*frame)
+        return event
@@ -0,0 +1,101 @@
+"""
+Per-connection outgoing buffers
+
+An Outbox queues bytes for one socket and a writer thread of its own sends
+them, so whoever produces an update (usually a player's thread holding the
+game lock) only appends to a deque and never waits on a slow reader. The
+queue is bounded: when more than max_bytes are waiting the outbox gives up
+on the connection, drops the queue, shuts the socket down and calls
+on_overflow(outbox) so the server can apply its policy for that kind of
+connection. on_overflow runs inside send(), so it must not take game locks.
+"""
+
+import socket
+import threading
+from collections import deque
+
+
+class Outbox:
+    def __init__(self, sock, max_bytes=64 * 1024, on_overflow=None, name="outbox"):
+        self.sock = sock
+        self.max_bytes = max_bytes
+        self.on_overflow = on_overflow
+        self.pending = deque()
+        self.pending_bytes = 0
+        self.inflight_bytes = 0  # Taken off the queue, being written now
+        self.high_water = 0  # Most bytes ever waiting at once
+        self.bytes_sent = 0
+        self.closed = False
+        self.overflowed = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def send(self, data):
+        """Queue data without blocking; returns False if the connection was dropped"""
+        with self.condition:
+            if self.closed:
+                return False
+            if self.pending_bytes + len(data) > self.max_bytes:
+                self._overflow()
+                return False
+            self.pending.append(data)
+            self.pending_bytes += len(data)
+            if self.pending_bytes > self.high_water:
+                self.high_water = self.pending_bytes
+            self.condition.notify()
+            return True
+
+    def close(self):
+        """Stop accepting data; the writer sends what is queued, then shuts the socket down"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+    def flush_and_wait(self, timeout=None):
+        """Close and wait until the writer has sent everything (or given up)"""
+        self.close()
+        self.thread.join(timeout)
+
+    def _overflow(self):
+        # Called with the condition held: nothing queued is worth sending any more
+        self.closed = True
+        self.overflowed = True
+        if self.on_overflow:
+            self.on_overflow(self)  # Still sees what was pending
+        self.pending.clear()
+        self.pending_bytes = 0
+        self.condition.notify()
+        self._shutdown()
+
+    def _shutdown(self):
+        try:
+            # Also wakes the writer if it is stuck in sendall, and the reader in recv
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.closed:
+                    self.condition.wait()
+                if not self.pending:
+                    break
+                # Everything queued so far goes out in one write
+                data = b''.join(self.pending)
+                self.pending.clear()
+                self.pending_bytes = 0
+                self.inflight_bytes = len(data)
+            try:
+                self.sock.sendall(data)
+                self.bytes_sent += len(data)
+                self.inflight_bytes = 0
+            except OSError:
+                with self.condition:
+                    self.closed = True
+                    self.pending.clear()
+                    self.pending_bytes = 0
+                    self.inflight_bytes = 0
+                break
+        self._shutdown()
@@ -0,0 +1,224 @@
+"""
+Wire protocol shared by server.py, async_server.py and client.py
+
+Every message travels as a frame: a fixed 5-byte header holding the message
+type (1 byte) and the payload length (4 bytes, big-endian), followed by the
+payload. Frames are self-delimiting, so any number of them can share one
+TCP segment and a reader never depends on how recv() happens to split the
+stream.
+"""
+
+import asyncio
+import itertools
+import struct
+
+import tictactoe as ttt
+
+HEADER = struct.Struct('!BI')
+
+MSG_TEXT = 1   # UTF-8 control message: new, join:<id>, move:i,j, game_over:..., error:...
+MSG_BOARD = 2  # Full board state, 9 bytes (see encode_board)
+MSG_MOVE = 3   # Delta carrying only the last move, 2 bytes (see encode_move)
+
+MAX_PAYLOAD = 64 * 1024  # Larger frames are treated as a protocol error
+
+
+# Board cells travel as one byte each, row by row
+CELL_CODES = {ttt.EMPTY: 0, ttt.X: 1, ttt.O: 2}
+CELL_VALUES = (ttt.EMPTY, ttt.X, ttt.O)
+
+# Decoding is a table lookup: 27 possible rows and 18 possible move deltas
+_ROWS = {bytes(codes): [CELL_VALUES[code] for code in codes]
+         for codes in itertools.product(range(3), repeat=3)}
+_MOVES = {bytes([cell, code]): (divmod(cell, 3), CELL_VALUES[code])
+          for cell in range(9) for code in (1, 2)}
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode_frame(msg_type, payload):
+    """
+    Returns the bytes of one frame carrying payload.
+    """
+    return HEADER.pack(msg_type, len(payload)) + payload
+
+
+def encode_text(text):
+    """
+    Returns the bytes of one text frame.
+    """
+    return encode_frame(MSG_TEXT, text.encode('utf-8'))
+
+
+def send_frame(sock, msg_type, payload):
+    sock.sendall(encode_frame(msg_type, payload))
+
+
+def send_text(sock, text):
+    sock.sendall(encode_text(text))
+
+
+def parse_header(header):
+    """
+    Returns (msg_type, length) from a frame header, rejecting oversized frames.
+    """
+    msg_type, length = HEADER.unpack(header)
+    if length > MAX_PAYLOAD:
+        raise ProtocolError(f"Frame of {length} bytes exceeds {MAX_PAYLOAD}")
+    return msg_type, length
+
+
+def recv_exact(sock, count):
+    """
+    Returns exactly count bytes from sock, or None if the peer closed first.
+    """
+    data = bytearray()
+    while len(data) < count:
+        chunk = sock.recv(count - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+def recv_frame(sock):
+    """
+    Returns the next (msg_type, payload) from a blocking socket, or None on EOF.
+    """
+    header = recv_exact(sock, HEADER.size)
+    if header is None:
+        return None
+    msg_type, length = parse_header(header)
+    payload = recv_exact(sock, length) if length else b''
+    if payload is None:
+        raise ConnectionError("Connection closed in the middle of a frame")
+    return msg_type, payload
+
+
+class FrameReader:
+    """
+    Reads frames from a blocking socket through one preallocated buffer.
+
+    recv_into() fills the buffer with whatever has arrived, so a read that
+    carries several frames costs one system call and they are parsed from
+    the buffer in place. A partial frame stays buffered until the rest
+    arrives. Payloads are memoryviews into the buffer and are only valid
+    until the next read_frame(): decode them (str(payload, 'utf-8'),
+    decode_board, decode_move) or copy them with bytes() before reading on.
+    """
+
+    def __init__(self, sock, size=4096):
+        self.sock = sock
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.start = 0  # First byte not yet returned
+        self.end = 0    # End of the bytes received so far
+
+    def buffered(self):
+        """Returns a copy of the bytes received but not yet returned as frames"""
+        return bytes(self.view[self.start:self.end])
+
+    def read_frame(self):
+        """
+        Returns the next (msg_type, payload) like recv_frame, or None on EOF.
+        """
+        while True:
+            available = self.end - self.start
+            needed = HEADER.size
+            if available >= HEADER.size:
+                msg_type, length = parse_header(self.view[self.start:self.start + HEADER.size])
+                needed += length
+                if available >= needed:
+                    payload_start = self.start + HEADER.size
+                    self.start = payload_start + length
+                    return msg_type, self.view[payload_start:self.start]
+            self._make_room(needed)
+            received = self.sock.recv_into(self.view[self.end:])
+            if not received:
+                if available:
+                    raise ConnectionError("Connection closed in the middle of a frame")
+                return None
+            self.end += received
+
+    def _make_room(self, needed):
+        """Make sure the frame being read fits after self.start"""
+        available = self.end - self.start
+        if available == 0:
+            self.start = self.end = 0
+        if self.start + needed <= len(self.buffer):
+            return
+        if needed > len(self.buffer):
+            # A frame bigger than the buffer (up to MAX_PAYLOAD); earlier
+            # payload views keep the old buffer alive
+            buffer = bytearray(max(needed, 2 * len(self.buffer)))
+            buffer[:available] = self.view[self.start:self.end]
+            self.buffer, self.view = buffer, memoryview(buffer)
+        else:
+            # Move the partial frame to the front (through a copy, the two may overlap)
+            self.buffer[:available] = self.buffer[self.start:self.end]
+        self.start, self.end = 0, available
+
+
+async def read_frame(reader):
+    """
+    Returns the next (msg_type, payload) from an asyncio StreamReader, or None on EOF.
+    """
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise ConnectionError("Connection closed in the middle of a frame")
+    msg_type, length = parse_header(header)
+    payload = await reader.readexactly(length) if length else b''
+    return msg_type, payload
+
+
+def encode_board(board):
+    """
+    Returns the 9-byte encoding of a 3x3 board.
+    """
+    return bytes([CELL_CODES[cell] for row in board for cell in row])
+
+
+def decode_board(data):
+    """
+    Returns the board encoded by encode_board.
+    """
+    if len(data) != 9:
+        raise ProtocolError(f"Board payload must be 9 bytes, got {len(data)}")
+    data = bytes(data)
+    try:
+        return [_ROWS[data[0:3]].copy(), _ROWS[data[3:6]].copy(), _ROWS[data[6:9]].copy()]
+    except KeyError:
+        raise ProtocolError("Invalid cell code in board payload")
+
+
+def encode_move(action, symbol):
+    """
+    Returns the 2-byte delta for symbol being played at action (i, j).
+    """
+    i, j = action
+    return bytes([i * 3 + j, CELL_CODES[symbol]])
+
+
+def decode_move(data):
+    """
+    Returns ((i, j), symbol) from a delta made by encode_move.
+    """
+    try:
+        return _MOVES[bytes(data)]
+    except KeyError:
+        raise ProtocolError("Invalid move delta")
+
+
+def apply_move(board, data):
+    """
+    Returns a copy of board with the delta applied.
+    """
+    (i, j), symbol = decode_move(data)
+    new_board = [board[0].copy(), board[1].copy(), board[2].copy()]
+    new_board[i][j] = symbol
+    return new_board
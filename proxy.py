@@ -0,0 +1,57 @@
+"""
+Byte-level relay between a client and the server that owns its game
+
+A server that receives a request for a game it does not host (a join or
+watch for a game on another worker or node) opens a connection to the
+owner, replays the first frame and then copies bytes both ways. The framed
+protocol passes through untouched, so neither the client nor the owner can
+tell the connection was relayed.
+"""
+
+import socket
+import threading
+
+CHUNK = 64 * 1024
+
+
+def connect_upstream(address, first, timeout=5.0):
+    """Connect to address and send the bytes already read from the client"""
+    upstream = socket.create_connection(address, timeout=timeout)
+    upstream.settimeout(None)
+    upstream.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    upstream.sendall(first)
+    return upstream
+
+
+def splice(client, upstream):
+    """Copy bytes between the two sockets until both directions have ended"""
+    def back():
+        _pump(upstream, client)
+        # The owner has finished with this client, so stop waiting on it too
+        _shutdown(client, socket.SHUT_RD)
+
+    thread = threading.Thread(target=back, name="relay", daemon=True)
+    thread.start()
+    _pump(client, upstream)
+    thread.join()
+
+
+def _pump(src, dst):
+    try:
+        while True:
+            data = src.recv(CHUNK)
+            if not data:
+                break
+            dst.sendall(data)
+    except OSError:
+        pass
+    finally:
+        # Pass the end of the stream on, so the other side finishes too
+        _shutdown(dst, socket.SHUT_WR)
+
+
+def _shutdown(sock, how):
+    try:
+        sock.shutdown(how)
+    except OSError:
+        pass
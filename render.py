@@ -0,0 +1,144 @@
+"""
+Retained-mode drawing for the pygame clients
+
+Each frame the UI code describes what should be on screen (text, rects,
+buttons) instead of painting it. present() compares that with what is
+already on screen and repaints only the rectangles that changed, with one
+display.update(rects) call. When nothing changed it draws nothing at all.
+Rendered text is cached, so a label is only rasterized the first time it
+is shown.
+
+events() replaces the busy `for event in pygame.event.get()` loop: it
+sleeps in pygame.event.wait until something happens. Background threads
+(the network listener, the AI search) post WAKE_EVENT with wake() when
+they change what should be shown, so the loop never has to poll for them.
+Right after events, or after again(), one more frame runs at most fps
+without sleeping. Clicks come from MOUSEBUTTONDOWN events (clicked()), so
+a click is seen exactly once and needs no debounce sleep.
+"""
+
+import pygame
+
+# Posted by background threads (network listener, AI worker) to wake the UI
+WAKE_EVENT = pygame.USEREVENT + 1
+
+
+class Renderer:
+    def __init__(self, screen, background=(0, 0, 0), fps=30, idle_timeout=1000):
+        self.screen = screen
+        self.background = background
+        self.fps = fps
+        self.idle_timeout = idle_timeout  # ms to sleep in event.wait when idle
+        self.clock = pygame.time.Clock()
+        self.glyphs = {}  # (font, text, color) -> rendered Surface
+        self.frame = []  # Draw operations described this frame
+        self.shown = None  # Operations currently on screen; None forces a full repaint
+        self.frames = 0  # present() calls that repainted something
+        self.skipped = 0  # present() calls with nothing to repaint
+        self.pending = True  # Run the next frame without waiting for input
+
+    def glyph(self, font, text, color):
+        """Return the rendered surface for text, rendering it only once"""
+        key = (font, text, color)
+        surface = self.glyphs.get(key)
+        if surface is None:
+            surface = self.glyphs[key] = font.render(text, True, color)
+        return surface
+
+    def text(self, font, text, color, center):
+        """Show text centered on center; returns its rect"""
+        rect = self.glyph(font, text, color).get_rect(center=(int(center[0]), int(center[1])))
+        self.frame.append(('text', font, text, color, tuple(rect)))
+        return rect
+
+    def rect(self, color, rect, width=0):
+        """Show a filled rect, or its outline when width > 0"""
+        rect = pygame.Rect(rect)
+        self.frame.append(('rect', color, width, tuple(rect)))
+        return rect
+
+    def button(self, rect, font, label, fill=(255, 255, 255), color=(0, 0, 0)):
+        """Show a filled button with a centered label; returns its rect"""
+        rect = self.rect(fill, rect)
+        self.text(font, label, color, rect.center)
+        return rect
+
+    def discard(self):
+        """Drop what has been described so far this frame"""
+        self.frame = []
+
+    def invalidate(self):
+        """Repaint the whole window on the next present()"""
+        self.shown = None
+
+    def present(self):
+        """Repaint what changed since the last call and push it to the display"""
+        frame, self.frame = self.frame, []
+        if frame == self.shown:
+            self.skipped += 1
+            return []
+        if self.shown is None:
+            dirty = [self.screen.get_rect()]
+        else:
+            # Anything drawn last time and not now, or now and not last time
+            changed = set(frame).symmetric_difference(self.shown)
+            dirty = [pygame.Rect(op[-1]) for op in changed]
+        for area in dirty:
+            self.screen.set_clip(area)
+            self.screen.fill(self.background, area)
+            for op in frame:
+                if area.colliderect(op[-1]):
+                    self._draw(op)
+        self.screen.set_clip(None)
+        pygame.display.update(dirty)
+        self.shown = frame
+        self.frames += 1
+        return dirty
+
+    def _draw(self, op):
+        if op[0] == 'text':
+            _, font, text, color, rect = op
+            self.screen.blit(self.glyph(font, text, color), rect)
+        else:
+            _, color, width, rect = op
+            pygame.draw.rect(self.screen, color, rect, width)
+
+    def events(self):
+        """
+        Return the pending events. Sleeps until there is at least one (a
+        wake() counts) or idle_timeout passes, unless the last frame had
+        events or asked for again(); then it only caps the frame rate.
+        """
+        if self.pending:
+            self.clock.tick(self.fps)
+            events = pygame.event.get()
+        else:
+            event = pygame.event.wait(self.idle_timeout)
+            events = [] if event.type == pygame.NOEVENT else [event] + pygame.event.get()
+        for event in events:
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.invalidate()
+        # The loops draw before they handle input, so whatever these events
+        # change is shown by one more frame rather than after a sleep
+        self.pending = bool(events)
+        return events
+
+    def again(self):
+        """Run the next frame without waiting, for state changed after drawing"""
+        self.pending = True
+
+
+def clicked(events):
+    """Return the position of the first left click in events, or None"""
+    for event in events:
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            return event.pos
+    return None
+
+
+def wake():
+    """Wake a UI thread sleeping in Renderer.events(); safe from any thread"""
+    try:
+        pygame.event.post(pygame.event.Event(WAKE_EVENT))
+    except pygame.error:
+        pass  # Display already shut down
@@ -1,7 +1,8 @@
 import pygame
 import sys
-import time
 
+import render
+from ai_service import AIService
 import tictactoe as ttt
 
 pygame.init()
@@ -17,51 +18,41 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+ui = render.Renderer(screen, black)
+
+# The computer's moves are searched on a background thread, so the window
+# keeps drawing; each answer comes within AI_BUDGET seconds
+AI_BUDGET = 0.5
+ai = AIService(workers=1, budget=AI_BUDGET, deepening=True)
+
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = ttt.GameState()  # Moves are pushed in place; turn and winner need no rescans
+ai_move = None  # MoveRequest for the computer's pending move
 
 while True:
 
-    for event in pygame.event.get():
+    # Sleeps until there is input or the computer's move is ready
+    events = ui.events()
+    for event in events:
         if event.type == pygame.QUIT:
             sys.exit()
-
-    screen.fill(black)
+    mouse = render.clicked(events)
 
     # Let user choose a player.
     if user is None:
 
         # Draw title
-        title = largeFont.render("Play Tic-Tac-Toe", True, white)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
+        ui.text(largeFont, "Play Tic-Tac-Toe", white, ((width / 2), 50))
 
         # Draw buttons
-        playXButton = pygame.Rect((width / 8), (height / 2), width / 4, 50)
-        playX = mediumFont.render("Play as X", True, black)
-        playXRect = playX.get_rect()
-        playXRect.center = playXButton.center
-        pygame.draw.rect(screen, white, playXButton)
-        screen.blit(playX, playXRect)
-
-        playOButton = pygame.Rect(5 * (width / 8), (height / 2), width / 4, 50)
-        playO = mediumFont.render("Play as O", True, black)
-        playORect = playO.get_rect()
-        playORect.center = playOButton.center
-        pygame.draw.rect(screen, white, playOButton)
-        screen.blit(playO, playORect)
+        playXButton = ui.button(((width / 8), (height / 2), width / 4, 50), mediumFont, "Play as X")
+        playOButton = ui.button((5 * (width / 8), (height / 2), width / 4, 50), mediumFont, "Play as O")
 
         # Check if button is clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
+        if mouse:
             if playXButton.collidepoint(mouse):
-                time.sleep(0.2)
                 user = ttt.X
             elif playOButton.collidepoint(mouse):
-                time.sleep(0.2)
                 user = ttt.O
 
     else:
@@ -74,27 +65,23 @@ while True:
         for i in range(3):
             row = []
             for j in range(3):
-                rect = pygame.Rect(
+                rect = ui.rect(white, (
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
                     tile_size, tile_size
-                )
-                pygame.draw.rect(screen, white, rect, 3)
-
-                if board[i][j] != ttt.EMPTY:
-                    move = moveFont.render(board[i][j], True, white)
-                    moveRect = move.get_rect()
-                    moveRect.center = rect.center
-                    screen.blit(move, moveRect)
+                ), 3)
+
+                if board.cells[i * 3 + j] != ttt.EMPTY:
+                    ui.text(moveFont, board.cells[i * 3 + j], white, rect.center)
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = board.terminal()
+        player = board.player()
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = board.winner
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -103,44 +90,33 @@ while True:
             title = f"Play as {user}"
         else:
             title = f"Computer thinking..."
-        title = largeFont.render(title, True, white)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 30)
-        screen.blit(title, titleRect)
+        ui.text(largeFont, title, white, ((width / 2), 30))
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = ai.request_move(board.to_board(), lambda action: render.wake())
+            elif ai_move.done.is_set():
+                board.push(ai_move.action)
+                ai_move = None
+                ui.again()
 
         # Check for a user move
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1 and user == player and not game_over:
-            mouse = pygame.mouse.get_pos()
+        if mouse and user == player and not game_over:
             for i in range(3):
                 for j in range(3):
-                    if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
+                    if (board.cells[i * 3 + j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
+                        board.push((i, j))
 
         if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
+            againButton = ui.button((width / 3, height - 65, width / 3, 50), mediumFont, "Play Again")
+            if mouse:
                 if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    board = ttt.GameState()
+                    if ai_move:
+                        ai_move.cancel()  # Drop a search still running for the old game
+                    ai_move = None
 
-    pygame.display.flip()
+    # Repaints only what changed since the last frame
+    ui.present()
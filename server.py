@@ -1,48 +1,106 @@
+import argparse
+import json
+import secrets
 import socket
 import threading
-import pickle
 import tictactoe as ttt
-import time
+import protocol
+from ai_service import AIService
+from games import Game, GameRegistry
+from matchmaking import MatchQueue
+from movelog import MoveLog, POLICIES
+from outbox import Outbox
+from proxy import splice, connect_upstream
 
 class TicTacToeServer:
-    def __init__(self, host='192.168.22.71', port=8000):
+    def __init__(self, host='192.168.22.71', port=8000, reuse_port=False, log_path=None, fsync='group',
+                 resume_grace=30.0):
         self.host = host
         self.port = port
         self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if reuse_port:
+            # Several worker processes share the port; the kernel spreads connections over them
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         self.server_socket.bind((self.host, self.port))
         self.clients = []
-        self.games = {}  # Dictionary to store game states: {game_id: (board, player1_conn, player2_conn)}
-        self.lock = threading.Lock()  # Add lock for thread safety
+        self.games = GameRegistry()  # game_id -> Game, each game guarded by its own lock
+        self.matches = MatchQueue(bucket_width=100)  # Hosts waiting for a quick_match opponent
+        self.ai = AIService()  # Computes bot moves for new_ai games off the connection threads
+        self.connections = set()  # Outbox of every open connection, for metrics
+        self.connections_lock = threading.Lock()
+        self.player_buffer = 32 * 1024  # Unsent bytes before a slow player is disconnected
+        self.spectator_buffer = 16 * 1024  # Unsent bytes before a slow spectator is dropped
+        self.players_disconnected = 0
+        self.spectators_dropped = 0
+        self.sessions = {}  # Resume token -> (game_id, player slot)
+        self.sessions_lock = threading.Lock()
+        self.resume_grace = resume_grace  # Seconds a dropped player's seat is held for resume:<token>
+        self.resumes = 0
+        # Write-ahead log of games and moves, so a restart can restore games in progress
+        self.log = MoveLog(log_path, fsync, snapshot_source=self.snapshot_games) if log_path else None
         
     def start(self):
+        if self.log:
+            self.recover_games()
         self.server_socket.listen()
         print(f"[SERVER] Started on {self.host}:{self.port}")
         print(f"[SERVER] Waiting for connections...")
         
         try:
-            while True:
-                client_socket, address = self.server_socket.accept()
-                print(f"[CONNECTION] New connection from {address}")
-                
-                client_thread = threading.Thread(target=self.handle_client, args=(client_socket, address))
-                client_thread.daemon = True  # Make thread daemon so it closes when main thread exits
-                client_thread.start()
-                print(f"[THREADING] Active threads: {threading.active_count()}")
+            self.accept_connections(self.server_socket)
         except KeyboardInterrupt:
             print("[SERVER] Shutting down server...")
         finally:
             self.cleanup()
     
+    def accept_connections(self, listener):
+        """Accept clients on listener forever, one thread each"""
+        while True:
+            client_socket, address = listener.accept()
+            # Every update is one small frame the other side does not answer;
+            # Nagle would hold each one back until the delayed ACK (~40 ms)
+            client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            print(f"[CONNECTION] New connection from {address}")
+            
+            client_thread = threading.Thread(target=self.handle_client, args=(client_socket, address))
+            client_thread.daemon = True  # Make thread daemon so it closes when main thread exits
+            client_thread.start()
+            print(f"[THREADING] Active threads: {threading.active_count()}")
+    
+    def route(self, request):
+        """
+        Returns the (host, port) of the server that should handle this first
+        request, or None to handle it here. A single server handles everything.
+        """
+        return None
+    
+    def forward(self, client_socket, first, upstream, address):
+        """Relay a client to the server that owns its request, starting with the bytes already read"""
+        try:
+            server = connect_upstream(upstream, first)
+        except OSError as e:
+            print(f"[ROUTE] Cannot reach {upstream} for {address}: {e}")
+            protocol.send_text(client_socket, "error:server_unavailable")
+            return
+        print(f"[ROUTE] Relaying {address} to {upstream}")
+        try:
+            splice(client_socket, server)
+        finally:
+            server.close()
+    
     def cleanup(self):
         print("[SERVER] Cleaning up resources...")
         # Close all game connections
-        for game_id, (_, p1, p2) in self.games.items():
-            try:
-                if p1: p1.close()
-                if p2: p2.close()
-            except:
-                pass
+        for game in self.games.all():
+            for conn in game.players():
+                try:
+                    conn.sock.close()
+                except:
+                    pass
+        self.ai.shutdown()
+        if self.log:
+            self.log.close()
         # Close server socket
         self.server_socket.close()
         print("[SERVER] Server shutdown complete")
@@ -50,39 +108,91 @@ class TicTacToeServer:
     def handle_client(self, client_socket, address):
         """Handle a client connection by either creating a new game or joining an existing one"""
         game_id = None
+        # Everything sent to this client goes through its outbox and writer thread
+        conn = Outbox(client_socket, self.player_buffer, on_overflow=self.disconnect_slow_player,
+                      name=f"out-{address[1]}")
+        with self.connections_lock:
+            self.connections.add(conn)
+        # Every frame from this client is parsed out of one reusable buffer
+        reader = protocol.FrameReader(client_socket)
         try:
-            # First message should be either 'new' or 'join'
-            data = client_socket.recv(1024)
-            request = data.decode('utf-8')
+            # First message should be either 'new', 'new_ai', 'quick_match', 'join', 'resume' or 'watch'
+            frame = reader.read_frame()
+            if frame is None:
+                return
+            _, data = frame
+            request = str(data, 'utf-8')
             
-            if request.startswith('new'):
+            upstream = self.route(request)
+            if upstream is not None:
+                # Anything the client sent after its request is already in the reader
+                self.forward(client_socket, protocol.encode_frame(*frame) + reader.buffered(), upstream, address)
+                return
+            
+            if request.startswith('new_ai'):
+                # Play against the server: new_ai or new_ai:O to let the bot open
+                human_symbol = ttt.O if request == 'new_ai:O' else ttt.X
+                if not self.ai.open_game():
+                    print(f"[ERROR] AI game refused for {address} - AI service full")
+                    conn.send(protocol.encode_text("error:ai_busy"))
+                    return
+                game_id = self.create_ai_game(conn, human_symbol)
+                print(f"[GAME] New AI game created: Game ID {game_id} by {address} playing {human_symbol}")
+                
+            elif request.startswith('new'):
                 # Create a new game
-                with self.lock:
-                    game_id = self.create_new_game(client_socket)
+                game_id = self.create_new_game(conn)
                 print(f"[GAME] New game created: Game ID {game_id} by {address}")
-                client_socket.send(f"new_game:{game_id}".encode('utf-8'))
                 print(f"[GAME:{game_id}] Waiting for opponent to join...")
                 
+            elif request.startswith('quick_match'):
+                # quick_match or quick_match:<rating> to be paired with a similar rating
+                _, _, rating = request.partition(':')
+                if rating and not rating.isdigit():
+                    print(f"[ERROR] Invalid rating from {address}: {rating}")
+                    conn.send(protocol.encode_text("error:invalid_request"))
+                    return
+                game_id = self.quick_match(conn, int(rating) if rating else None)
+                print(f"[MATCH] Player {address} matched into game {game_id}")
+                
+            elif request.startswith('watch'):
+                # Follow a game without playing: watch:<id>
+                _, watch_id = request.split(':')
+                self.watch_game(conn, watch_id, address, reader)
+                return
+                
+            elif request.startswith('resume'):
+                # Take a seat back after a dropped connection: resume:<token>
+                _, _, token = request.partition(':')
+                game_id = self.resume_game(conn, token)
+                if game_id is None:
+                    print(f"[ERROR] Resume refused for {address} - unknown token or game over")
+                    conn.send(protocol.encode_text("error:resume_failed"))
+                    return
+                print(f"[GAME:{game_id}] Player {address} resumed")
+                
+            elif request == 'stats':
+                conn.send(protocol.encode_text("stats:" + json.dumps(self.metrics())))
+                return
+                
             elif request.startswith('join'):
                 # Join an existing game
                 _, game_id = request.split(':')
-                with self.lock:
-                    success = self.join_game(client_socket, game_id)
+                success = self.join_game(conn, game_id)
                 if success:
                     print(f"[GAME:{game_id}] Player {address} joined")
-                    client_socket.send(f"joined:{game_id}".encode('utf-8'))
                     print(f"[GAME:{game_id}] Game is ready to start")
                 else:
                     print(f"[ERROR] Failed to join game {game_id} - game not found or full")
-                    client_socket.send("error:game_not_found".encode('utf-8'))
+                    conn.send(protocol.encode_text("error:game_not_found"))
                     return
             else:
                 print(f"[ERROR] Unknown request from {address}: {request}")
-                client_socket.send("error:invalid_request".encode('utf-8'))
+                conn.send(protocol.encode_text("error:invalid_request"))
                 return
                     
             # Now handle game moves
-            self.handle_game_moves(client_socket, game_id, address)
+            self.handle_game_moves(conn, game_id, address, reader)
                 
         except Exception as e:
             print(f"[ERROR] Error handling client {address}: {e}")
@@ -90,99 +200,441 @@ class TicTacToeServer:
             print(f"[CONNECTION] Client {address} disconnected")
             if game_id:
                 print(f"[GAME:{game_id}] Game ended due to player disconnect")
+            # Let the writer finish (e.g. a final game_over) before closing
+            conn.flush_and_wait(5)
+            with self.connections_lock:
+                self.connections.discard(conn)
             client_socket.close()
     
-    def create_new_game(self, client_socket):
-        """Create a new game and return its ID"""
-        game_id = str(len(self.games) + 1)
-        board = ttt.initial_state()
-        self.games[game_id] = (board, client_socket, None)
+    def create_new_game(self, conn):
+        """Create a new game, tell the host its ID and return it"""
+        game_id = self.games.new_id()
+        game = Game(game_id, conn)
+        with game.lock:
+            self.games.add(game)
+            self.log_new_game(game)
+            # Queued before anyone joining can queue opponent_joined
+            conn.send(protocol.encode_text(f"new_game:{game_id}"))
+            self.issue_token(conn, game, 1)
         return game_id
     
-    def join_game(self, client_socket, game_id):
+    def create_ai_game(self, conn, human_symbol):
+        """Create a game against the server AI and return its ID"""
+        game_id = self.games.new_id()
+        if human_symbol == ttt.X:
+            game = Game(game_id, conn)
+            game.bot = ttt.O
+        else:
+            game = Game(game_id, None, conn)
+            game.bot = ttt.X
+        with game.lock:
+            self.games.add(game)
+            self.log_new_game(game)
+            if human_symbol == ttt.X:
+                # Same replies a host gets, so clients need nothing new
+                conn.send(protocol.encode_text(f"new_game:{game_id}") +
+                          protocol.encode_text("opponent_joined"))
+                self.issue_token(conn, game, 1)
+            else:
+                conn.send(protocol.encode_text(f"joined:{game_id}"))
+                self.issue_token(conn, game, 2)
+            if game.bot == game.state.player():
+                self.request_bot_move(game)
+        return game_id
+    
+    def request_bot_move(self, game):
+        """Queue the bot's reply; call with game.lock held"""
+        moves_played = len(game.state.history)
+        self.ai.request_move(game.state.to_board(),
+                             lambda action: self.play_bot_move(game, action, moves_played))
+    
+    def play_bot_move(self, game, action, moves_played):
+        """Apply a move computed by the AI service, unless the game moved on meanwhile"""
+        with game.lock:
+            if not game.active or len(game.state.history) != moves_played or game.state.player() != game.bot:
+                return
+            player_num = 1 if game.bot == ttt.X else 2
+            self.play_move(game, action, game.bot, player_num)
+    
+    def join_game(self, conn, game_id):
         """Join an existing game if it exists and is not full"""
-        if game_id in self.games and self.games[game_id][2] is None:
-            board, player1, _ = self.games[game_id]
-            self.games[game_id] = (board, player1, client_socket)
+        game = self.games.get(game_id)
+        if game is None:
+            return False
+        with game.lock:
+            if game.active and game.recovered:
+                return self.rejoin_game(conn, game)
+            # A seat held for a dropped player is not free either, and AI
+            # games have no seat for a second human at all
+            if not game.active or game.bot is not None or game.player2 is not None or 2 in game.tokens:
+                return False
+            game.player2 = conn
             
             # Notify first player that someone joined
-            player1.send("opponent_joined".encode('utf-8'))
+            game.player1.send(protocol.encode_text("opponent_joined"))
+            conn.send(protocol.encode_text(f"joined:{game_id}"))
+            self.issue_token(conn, game, 2)
             return True
-        return False
     
-    def handle_game_moves(self, client_socket, game_id, address):
+    def rejoin_game(self, conn, game):
+        """
+        Seat a player in an empty slot of a game restored from the log; call
+        with game.lock held. The reply is resumed:<id>:<symbol> followed by
+        the board.
+        """
+        # Seats with a token are kept for their owner's resume:<token>
+        if game.player1 is None and game.bot != ttt.X and 1 not in game.tokens:
+            slot = 1
+        elif game.player2 is None and game.bot != ttt.O and 2 not in game.tokens:
+            slot = 2
+        else:
+            return False
+        self.seat_player(conn, game, slot)
+        self.issue_token(conn, game, slot)
+        return True
+    
+    def seat_player(self, conn, game, slot):
+        """
+        Put conn in an empty seat of a game already under way and send it
+        resumed:<id>:<symbol> plus the board in one write; call with
+        game.lock held.
+        """
+        if slot == 1:
+            game.player1 = conn
+            symbol, other = ttt.X, game.player2
+        else:
+            game.player2 = conn
+            symbol, other = ttt.O, game.player1
+        if other is not None:
+            other.send(protocol.encode_text("opponent_joined"))
+        conn.send(protocol.encode_text(f"resumed:{game.game_id}:{symbol}") +
+                  protocol.encode_frame(protocol.MSG_BOARD, protocol.encode_board(game.state.to_board())))
+        if game.bot is not None and game.bot == game.state.player():
+            self.request_bot_move(game)
+    
+    def issue_token(self, conn, game, slot):
+        """Give the player in slot a resume token, sent as token:<token>; call with game.lock held"""
+        # Starts with the game ID, so workers and cluster nodes can route resume requests
+        token = f"{game.game_id}.{secrets.token_urlsafe(12)}"
+        game.tokens[slot] = token
+        with self.sessions_lock:
+            self.sessions[token] = (game.game_id, slot)
+        if self.log:
+            self.log.token(game.game_id, slot, token)
+        conn.send(protocol.encode_text(f"token:{token}"))
+    
+    def resume_game(self, conn, token):
+        """Seat conn in the game its token belongs to; returns the game ID, or None"""
+        with self.sessions_lock:
+            session = self.sessions.get(token)
+        if session is None:
+            return None
+        game_id, slot = session
+        game = self.games.get(game_id)
+        if game is None:
+            return None
+        with game.lock:
+            if not game.active or game.tokens.get(slot) != token:
+                return None
+            timer = game.away.pop(slot, None)
+            if timer is not None:
+                timer.cancel()
+            old = game.player1 if slot == 1 else game.player2
+            if old is not None:
+                # The old connection may be half-open; this one takes over
+                # and the old handler leaves the game alone
+                old.close()
+            self.seat_player(conn, game, slot)
+        with self.connections_lock:
+            self.resumes += 1
+        return game_id
+    
+    def hold_seat(self, game, slot):
+        """
+        Empty a dropped player's seat and end the game unless they resume
+        within resume_grace seconds; call with game.lock held.
+        """
+        if slot == 1:
+            game.player1 = None
+        else:
+            game.player2 = None
+        timer = threading.Timer(self.resume_grace, self.release_seat, args=(game, slot))
+        timer.daemon = True
+        game.away[slot] = timer
+        timer.start()
+        for conn in game.players():
+            conn.send(protocol.encode_text(f"opponent_away:{self.resume_grace:g}"))
+    
+    def release_seat(self, game, slot):
+        """The grace period ran out: the game ends as a disconnect"""
+        with game.lock:
+            # A resume that cancelled this timer too late has already replaced it
+            if game.active and game.away.get(slot) is threading.current_thread():
+                del game.away[slot]
+                print(f"[GAME:{game.game_id}] Player {slot} did not resume in {self.resume_grace:g}s")
+                self.abandon_game(game)
+    
+    def abandon_game(self, game):
+        """End a game because a player left for good; call with game.lock held"""
+        for conn in game.players():
+            conn.send(protocol.encode_text("opponent_disconnected"))
+        self.broadcast(game, protocol.encode_text("player_disconnected"))
+        print(f"[GAME:{game.game_id}] Game ended due to player disconnect")
+        self.end_game(game)
+    
+    def log_new_game(self, game):
+        """Log a game just added to the registry; call with game.lock held"""
+        if self.log:
+            self.log.new_game(game.game_id, game.bot)
+    
+    def snapshot_games(self):
+        """Snapshot source for the move log: an ID just handed out and every game in progress"""
+        # Burning an ID records how far the counter got, including games already over
+        last_id = self.games.new_id()
+        games = [(game.game_id, game.bot, [cell for cell, _ in list(game.state.history)], dict(game.tokens))
+                 for game in self.games.all() if game.active]
+        return last_id, games
+    
+    def recover_games(self):
+        """Restore the games in progress from the move log"""
+        games, ids = self.log.recover()
+        self.games.reserve(ids)
+        restored = 0
+        for game_id, (bot, cells, tokens) in games.items():
+            state = ttt.GameState()
+            for cell in cells:
+                state.push(divmod(cell, 3))
+            if state.terminal():
+                # Finished, but the crash came before its end record
+                self.log.end_game(game_id)
+                continue
+            game = Game(game_id, None, state=state)
+            game.bot = bot
+            game.recovered = True
+            if bot:
+                self.ai.open_game()
+            self.games.add(game)
+            # Players with a token get their usual grace period to resume
+            game.tokens = tokens
+            with game.lock:
+                for slot, token in tokens.items():
+                    self.sessions[token] = (game_id, slot)
+                    self.hold_seat(game, slot)
+            restored += 1
+        print(f"[RECOVERY] Restored {restored} games in progress from {self.log.path}")
+    
+    def quick_match(self, conn, rating=None):
+        """
+        Pair the client with the longest-waiting player in its rating bucket,
+        or open a game and queue it. Replies like new / join, so the client
+        sees new_game:<id> (then opponent_joined) or joined:<id>. Returns
+        the game ID.
+        """
+        while True:
+            game = Game(self.games.new_id(), conn)
+            # Hold the new game's lock until new_game is sent, so whoever pops
+            # it from the queue cannot send opponent_joined first
+            with game.lock:
+                match = self.matches.match(game, rating, alive=lambda g: g.active and g.player2 is None)
+                if match is None:
+                    self.games.add(game)
+                    self.log_new_game(game)
+                    conn.send(protocol.encode_text(f"new_game:{game.game_id}"))
+                    self.issue_token(conn, game, 1)
+                    return game.game_id
+            waiting, waited = match
+            with waiting.lock:
+                # The host may have left between leaving the queue and now
+                if waiting.active and waiting.player2 is None:
+                    waiting.player2 = conn
+                    waiting.player1.send(protocol.encode_text("opponent_joined"))
+                    conn.send(protocol.encode_text(f"joined:{waiting.game_id}"))
+                    self.issue_token(conn, waiting, 2)
+                    self.matches.record(waited)
+                    print(f"[MATCH] Game {waiting.game_id} paired after {waited * 1000:.1f} ms in queue")
+                    return waiting.game_id
+    
+    def watch_game(self, conn, game_id, address, reader):
+        """Stream a game's moves to a spectator until the game or the connection ends"""
+        # Spectators get a smaller buffer and are dropped rather than reported
+        conn.max_bytes = self.spectator_buffer
+        conn.on_overflow = self.drop_slow_spectator
+        game = self.games.get(game_id)
+        watching = False
+        if game is not None:
+            with game.lock:
+                if game.active:
+                    # Current position first, then every move through the same outbox
+                    conn.send(protocol.encode_text(f"watching:{game_id}") +
+                              protocol.encode_frame(protocol.MSG_BOARD, protocol.encode_board(game.state.to_board())))
+                    game.spectators.append(conn)
+                    watching = True
+                    print(f"[GAME:{game_id}] Spectator {address} watching ({len(game.spectators)} total)")
+        if not watching:
+            print(f"[ERROR] Cannot watch game {game_id} - game not found")
+            conn.send(protocol.encode_text("error:game_not_found"))
+            return
+        
+        # Spectators send nothing; wait for them to leave or for the outbox to shut the socket
+        try:
+            while reader.read_frame() is not None:
+                pass
+        except OSError:
+            pass
+        with game.lock:
+            if conn in game.spectators:
+                game.spectators.remove(conn)
+    
+    def disconnect_slow_player(self, conn):
+        """Overflow policy for players: the socket is shut down, so the game ends as a disconnect"""
+        with self.connections_lock:
+            self.players_disconnected += 1
+        print(f"[BACKPRESSURE] Disconnecting slow player: {conn.pending_bytes + conn.inflight_bytes} bytes unsent")
+    
+    def drop_slow_spectator(self, conn):
+        """Overflow policy for spectators: dropped from the game, the players never notice"""
+        with self.connections_lock:
+            self.spectators_dropped += 1
+        print("[BACKPRESSURE] Dropped slow spectator")
+    
+    def metrics(self):
+        """
+        Returns outbound queue metrics across all open connections.
+        """
+        with self.connections_lock:
+            conns = list(self.connections)
+        depths = [len(conn.pending) for conn in conns]
+        pending = [conn.pending_bytes + conn.inflight_bytes for conn in conns]
+        return {
+            'connections': len(conns),
+            'queued_frames': sum(depths),
+            'max_queue_depth': max(depths, default=0),
+            'bytes_pending': sum(pending),
+            'max_bytes_pending': max(pending, default=0),
+            'high_water_bytes': max((conn.high_water for conn in conns), default=0),
+            'players_disconnected': self.players_disconnected,
+            'spectators_dropped': self.spectators_dropped,
+            'resumes': self.resumes,
+            'seats_held': sum(len(game.away) for game in self.games.all()),
+        }
+    
+    def broadcast(self, game, data):
+        """Queue data for every spectator, dropping those that cannot keep up; call with game.lock held"""
+        if game.spectators:
+            game.spectators = [outbox for outbox in game.spectators if outbox.send(data)]
+    
+    def end_game(self, game):
+        """Remove a game from the registry; call with game.lock held"""
+        game.active = False
+        self.games.remove(game.game_id)
+        if self.log:
+            self.log.end_game(game.game_id)
+        with self.sessions_lock:
+            for token in game.tokens.values():
+                self.sessions.pop(token, None)
+        for timer in game.away.values():
+            timer.cancel()
+        game.away = {}
+        for outbox in game.spectators:
+            outbox.close()
+        game.spectators = []
+        if game.bot:
+            self.ai.close_game()
+    
+    def play_move(self, game, action, player_symbol, player_num):
+        """
+        Make a move for player_symbol and send it to the players; call with
+        game.lock held. Raises ValueError for an illegal move and returns
+        True if the move ended the game.
+        """
+        game_id = game.game_id
+        i, j = action
+        game.state.push(action)
+        if self.log:
+            # On disk (per the fsync policy) before anyone hears of the move
+            self.log.move(game_id, len(game.state.history) - 1, action)
+        print(f"[GAME:{game_id}] Valid move by Player {player_num} at ({i},{j})")
+        
+        # Send the move to both players; when the game is over
+        # the result is pipelined into the same write
+        update = protocol.encode_frame(protocol.MSG_MOVE, protocol.encode_move(action, player_symbol))
+        game_over = game.state.terminal()
+        if game_over:
+            winner = game.state.winner
+            if winner is None:
+                print(f"[GAME:{game_id}] Game ended in a tie")
+                result = "tie"
+            else:
+                winner_num = 1 if winner == ttt.X else 2
+                print(f"[GAME:{game_id}] Player {winner_num} wins")
+                result = f"winner:{winner}"
+            update += protocol.encode_text(f"game_over:{result}")
+
+        # Queued for each player's writer; a slow opponent never blocks this thread
+        for conn in game.players():
+            conn.send(update)
+        self.broadcast(game, update)
+
+        if game_over:
+            # Clean up the game
+            print(f"[GAME:{game_id}] Game completed successfully")
+            self.end_game(game)
+        elif game.bot == game.state.player():
+            self.request_bot_move(game)
+        return game_over
+    
+    def handle_game_moves(self, conn, game_id, address, reader):
         """Handle moves for a specific game"""
         # Find which player number this client is (1 or 2)
-        board, p1, p2 = self.games[game_id]
-        player_num = 1 if client_socket == p1 else 2
+        game = self.games.get(game_id)
+        if game is None:
+            return
+        player_num = 1 if conn is game.player1 else 2
         player_symbol = ttt.X if player_num == 1 else ttt.O
             
         print(f"[GAME:{game_id}] Player {player_num} ({player_symbol}) ready at {address}")
+        leaving = False  # Said 'leave', so the seat is not held for a resume
             
         while True:
             try:
-                data = client_socket.recv(1024)
-                if not data:
+                frame = reader.read_frame()
+                if frame is None or conn.closed:
                     print(f"[GAME:{game_id}] Player {player_num} disconnected")
                     break
                     
-                message = data.decode('utf-8')
+                _, data = frame
+                message = str(data, 'utf-8')
                 if message.startswith('move'):
                     # Process move: move:i,j
                     _, coords = message.split(':')
                     i, j = map(int, coords.split(','))
                     print(f"[GAME:{game_id}] Player {player_num} attempts move at ({i},{j})")
                     
-                    with self.lock:
-                        board, p1, p2 = self.games[game_id]
+                    # Only this game is locked; other games keep moving in parallel
+                    with game.lock:
+                        # Over, or the seat was taken back by a resume on another connection
+                        if not game.active or conn is not (game.player1 if player_num == 1 else game.player2):
+                            break
                     
                         # Check if it's this player's turn
-                        current_player = ttt.player(board)
+                        current_player = game.state.player()
                         
                         if current_player == player_symbol:
                             # Make the move
                             try:
-                                new_board = ttt.result(board, (i, j))
-                                self.games[game_id] = (new_board, p1, p2)
-                                print(f"[GAME:{game_id}] Valid move by Player {player_num} at ({i},{j})")
-                                
-                                # Send updated board to both players
-                                board_data = pickle.dumps(new_board)
-                                p1.send(f"board_update:{len(board_data)}".encode('utf-8'))
-                                time.sleep(0.1)  # Small delay to ensure message separation
-                                p1.send(board_data)
-                                
-                                if p2:
-                                    p2.send(f"board_update:{len(board_data)}".encode('utf-8'))
-                                    time.sleep(0.1)  # Small delay to ensure message separation
-                                    p2.send(board_data)
-                                    
-                                # Check if game is over
-                                if ttt.terminal(new_board):
-                                    winner = ttt.winner(new_board)
-                                    if winner is None:
-                                        print(f"[GAME:{game_id}] Game ended in a tie")
-                                        result = "tie"
-                                    else:
-                                        winner_num = 1 if winner == ttt.X else 2
-                                        print(f"[GAME:{game_id}] Player {winner_num} wins")
-                                        result = f"winner:{winner}"
-                                    
-                                    p1.send(f"game_over:{result}".encode('utf-8'))
-                                    if p2:
-                                        p2.send(f"game_over:{result}".encode('utf-8'))
-                                    
-                                    # Clean up the game
-                                    print(f"[GAME:{game_id}] Game completed successfully")
-                                    del self.games[game_id]
+                                if self.play_move(game, (i, j), player_symbol, player_num):
                                     return
                                 
                             except ValueError as ve:
                                 print(f"[GAME:{game_id}] Invalid move by Player {player_num}: {ve}")
-                                client_socket.send("error:invalid_move".encode('utf-8'))
+                                conn.send(protocol.encode_text("error:invalid_move"))
                         else:
                             print(f"[GAME:{game_id}] Not Player {player_num}'s turn")
-                            client_socket.send("error:not_your_turn".encode('utf-8'))
+                            conn.send(protocol.encode_text("error:not_your_turn"))
+                elif message == 'leave':
+                    print(f"[GAME:{game_id}] Player {player_num} left the game")
+                    leaving = True
+                    break
                 else:
                     print(f"[GAME:{game_id}] Unknown message from Player {player_num}: {message}")
                         
@@ -191,21 +643,30 @@ class TicTacToeServer:
                 break
         
         # Clean up the game if a player disconnects
-        with self.lock:
-            if game_id in self.games:
-                board, p1, p2 = self.games[game_id]
-                if client_socket == p1 and p2:
-                    print(f"[GAME:{game_id}] Player 1 disconnected, notifying Player 2")
-                    p2.send("opponent_disconnected".encode('utf-8'))
-                elif client_socket == p2 and p1:
-                    print(f"[GAME:{game_id}] Player 2 disconnected, notifying Player 1")
-                    p1.send("opponent_disconnected".encode('utf-8'))
-                print(f"[GAME:{game_id}] Game ended due to player disconnect")
-                del self.games[game_id]
+        with game.lock:
+            if not game.active or conn is not (game.player1 if player_num == 1 else game.player2):
+                return  # Already over, or this seat has been resumed elsewhere
+            # Players cut off by the slow-player policy are not let back in
+            if not leaving and not conn.overflowed and player_num in game.tokens and \
+                    (game.bot is not None or 3 - player_num in game.tokens):
+                # The game has both sides: keep the seat for a resume:<token>
+                print(f"[GAME:{game_id}] Holding Player {player_num}'s seat for {self.resume_grace:g}s")
+                self.hold_seat(game, player_num)
+            else:
+                self.abandon_game(game)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Threaded TicTacToe server")
+    parser.add_argument('--host', default='192.168.22.71')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--log', help="move log file; games in progress survive a restart")
+    parser.add_argument('--fsync', choices=POLICIES, default='group', help="when the move log is fsynced")
+    parser.add_argument('--resume-grace', type=float, default=30.0,
+                        help="seconds a dropped player's seat is held for resume:<token>")
+    args = parser.parse_args()
     try:
-        server = TicTacToeServer()
+        server = TicTacToeServer(args.host, args.port, log_path=args.log, fsync=args.fsync,
+                                 resume_grace=args.resume_grace)
         print("[SERVER] TicTacToe Server Initializing...")
         server.start()
     except Exception as e:
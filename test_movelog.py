@@ -0,0 +1,166 @@
+"""
+Crash recovery checks for movelog.py and TicTacToeServer.recover_games
+
+    python -m unittest test_movelog
+"""
+
+import contextlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from benchmarks.common import wait_for_port
+from movelog import MoveLog
+from netclient import GameClient
+from server import TicTacToeServer
+
+
+class MoveLogTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "moves.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, data):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+    def test_torn_last_record(self):
+        self.write(b"N 1 -\nM 1 0 0\nM 1 1 4\nM 1 2")
+        log = MoveLog(self.path)
+        games, ids = log.recover()
+        self.assertEqual(games, {'1': (None, [0, 4], {})})
+        # Appended after a restart: must not be glued onto the torn record
+        log.new_game('2')
+        log.move('2', 0, (1, 1))
+        log.close()
+        games, ids = MoveLog(self.path).recover()
+        self.assertEqual(games, {'1': (None, [0, 4], {}), '2': (None, [4], {})})
+        self.assertEqual(ids, ['1', '2'])
+
+    def test_malformed_records_are_skipped(self):
+        self.write(b"N 1 -\nT 1\nT 5\nM 1\nM 1 0 x\nM 1 0 9\nbogus\n\nM 1 0 4\nT 1 1 1.abc\n")
+        games, ids = MoveLog(self.path).recover()
+        self.assertEqual(games, {'1': (None, [4], {1: '1.abc'})})
+
+    def test_snapshot_then_tail(self):
+        live = {}
+        log = MoveLog(self.path, snapshot_source=lambda: ('3', list(live.values())))
+        log.new_game('1')
+        log.new_game('2', 'O')
+        log.token('2', 1, '2.tok')
+        log.move('2', 0, (1, 1))
+        log.end_game('1')
+        live['2'] = ('2', 'O', [4], {1: '2.tok'})
+        log.snapshot()
+        log.move('2', 1, (0, 0))
+        log.new_game('4')
+        log.close()
+        games, ids = MoveLog(self.path).recover()
+        self.assertEqual(games, {'2': ('O', [4, 0], {1: '2.tok'}), '4': (None, [], {})})
+        self.assertIn('3', ids)
+        self.assertIn('4', ids)
+
+    def test_replay_is_idempotent(self):
+        live = {}
+        log = MoveLog(self.path, snapshot_source=lambda: ('2', list(live.values())))
+        log.new_game('1')
+        log.token('1', 1, '1.a')
+        log.move('1', 0, (0, 0))
+        log.move('1', 1, (1, 1))
+        log.file.flush()
+        with open(self.path, 'rb') as f:
+            before = f.read()
+        live['1'] = ('1', None, [0, 4], {1: '1.a'})
+        log.snapshot()
+        log.move('1', 2, (0, 1))
+        log.close()
+        expected = MoveLog(self.path).recover()
+        self.assertEqual(expected[0], {'1': (None, [0, 4, 1], {1: '1.a'})})
+
+        # A crash after the snapshot was renamed in but before the log was
+        # truncated leaves records the snapshot already covers
+        with open(self.path, 'rb') as f:
+            tail = f.read()
+        self.write(before + tail)
+        self.assertEqual(MoveLog(self.path).recover()[0], expected[0])
+        # And replaying the same files twice changes nothing
+        self.assertEqual(MoveLog(self.path).recover()[0], expected[0])
+
+
+class RestartTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "moves.log")
+        self.clients = []
+        # The servers log every connection and move
+        self.quiet = contextlib.redirect_stdout(open(os.devnull, 'w'))
+        self.quiet.__enter__()
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        time.sleep(0.2)  # Let the servers log the disconnects while still quiet
+        self.quiet.__exit__(None, None, None)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def start_server(self):
+        """Start a threaded server on a free port over the shared log; returns (server, port)"""
+        server = TicTacToeServer('127.0.0.1', 0, log_path=self.path, resume_grace=60)
+        port = server.server_socket.getsockname()[1]
+        threading.Thread(target=server.start, daemon=True).start()
+        # start() recovers the log before it listens
+        wait_for_port('127.0.0.1', port)
+        return server, port
+
+    def client(self, port):
+        client = GameClient('127.0.0.1', port, timeout=5)
+        client.connect()
+        self.clients.append(client)
+        return client
+
+    def test_resume_after_restart(self):
+        first, port = self.start_server()
+        x, o = self.client(port), self.client(port)
+        game_id = x.create_game()
+        self.assertTrue(o.join_game(game_id))
+        # x's token arrives between new_game and this, and is kept on x.token
+        self.assertEqual(x.next_event(), ('text', 'opponent_joined'))
+        x.send_move((1, 1))
+        self.assertEqual(x.next_event(), ('move', ((1, 1), 'X')))
+        self.assertEqual(o.next_event(), ('move', ((1, 1), 'X')))
+        self.assertIsNotNone(x.token)
+        self.assertIsNotNone(o.token)
+
+        # A second server over the same log stands in for the restarted process
+        second, port = self.start_server()
+        self.assertIn(game_id, second.games)
+
+        stranger = self.client(port)
+        self.assertFalse(stranger.join_game(game_id))
+
+        x2, o2 = self.client(port), self.client(port)
+        self.assertTrue(x2.resume(x.token))
+        self.assertEqual((x2.game_id, x2.symbol), (game_id, 'X'))
+        self.assertEqual(x2.next_event()[0], 'board')
+        self.assertTrue(o2.resume(o.token))
+        self.assertEqual(o2.symbol, 'O')
+        self.assertEqual(o2.next_event(), ('board', [[None, None, None], [None, 'X', None], [None, None, None]]))
+        self.assertEqual(x2.next_event(), ('text', 'opponent_joined'))
+
+        o2.send_move((0, 0))
+        self.assertEqual(x2.next_event(), ('move', ((0, 0), 'O')))
+        self.assertEqual(o2.next_event(), ('move', ((0, 0), 'O')))
+
+        # A new game never reuses a logged ID
+        fresh = self.client(port)
+        self.assertNotEqual(fresh.create_game(), game_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
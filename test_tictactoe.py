@@ -0,0 +1,139 @@
+"""
+Equivalence checks for the tictactoe.py engines
+
+Every faster engine added to tictactoe.py and variants.py must agree with
+the plain functions: alpha-beta and the in-place search with solve() and
+minimax on every reachable position, GameState and Variant(3, 3) with the
+list-of-lists rules, and batch_evaluate with them on all 3^9 boards.
+
+    python -m unittest test_tictactoe
+"""
+
+import itertools
+import unittest
+
+import tictactoe as ttt
+from variants import CLASSIC
+
+
+def reachable_boards():
+    """Returns {board_key: board} for every position reachable in a legal game"""
+    boards = {}
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        key = ttt.board_key(board)
+        if key in boards:
+            continue
+        boards[key] = board
+        if not ttt.terminal(board):
+            stack.extend(ttt.result(board, action) for action in ttt.actions(board))
+    return boards
+
+
+class SearchTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.boards = list(reachable_boards().values())
+        cls.open_boards = [board for board in cls.boards if not ttt.terminal(board)]
+
+    def test_position_counts(self):
+        self.assertEqual(len(self.boards), 5478)
+        self.assertEqual(len(self.open_boards), 4520)
+
+    def test_minimax_matches_solve(self):
+        for board in self.open_boards:
+            self.assertEqual(ttt.minimax(board), ttt.solve(board)[1], board)
+
+    def test_alphabeta_matches_solve(self):
+        for board in self.open_boards:
+            value, action, _ = ttt.alphabeta_search(board)
+            self.assertEqual((value, action), ttt.solve(board), board)
+
+    def test_inplace_search_matches_solve(self):
+        for board in self.open_boards:
+            self.assertEqual(ttt.inplace_search(board), ttt.solve(board), board)
+
+    def test_terminal_boards(self):
+        for board in self.boards:
+            if ttt.terminal(board):
+                self.assertIsNone(ttt.minimax(board))
+                self.assertEqual(ttt.alphabeta_search(board)[:2], (ttt.utility(board), None))
+                self.assertEqual(ttt.inplace_search(board), (ttt.utility(board), None))
+
+
+class GameStateTest(unittest.TestCase):
+    def test_matches_board_functions(self):
+        for board in reachable_boards().values():
+            state = ttt.GameState.from_board(board)
+            self.assertEqual(state.to_board(), board)
+            self.assertEqual(ttt.player(state), ttt.player(board))
+            self.assertEqual(ttt.winner(state), ttt.winner(board))
+            self.assertEqual(ttt.terminal(state), ttt.terminal(board))
+            self.assertEqual(ttt.utility(state), ttt.utility(board))
+            self.assertEqual(ttt.actions(state), ttt.actions(board))
+            if not ttt.terminal(board):
+                self.assertEqual(ttt.minimax(state), ttt.minimax(board))
+                self.assertEqual(ttt.alphabeta(state), ttt.alphabeta(board))
+
+    def test_push_pop_round_trip(self):
+        for board in reachable_boards().values():
+            if ttt.terminal(board):
+                continue
+            state = ttt.GameState.from_board(board)
+            for action in state.actions():
+                child = ttt.result(state, action)
+                self.assertEqual(child.to_board(), ttt.result(board, action))
+                self.assertEqual(state.to_board(), board)  # result() leaves the state alone
+                state.push(action)
+                self.assertEqual(state.winner, ttt.winner(child.to_board()))
+                self.assertEqual(state.pop(), action)
+                self.assertEqual(state.to_board(), board)
+
+    def test_illegal_moves(self):
+        state = ttt.GameState()
+        state.push((1, 1))
+        with self.assertRaises(ValueError):
+            state.push((1, 1))
+        with self.assertRaises(ValueError):
+            ttt.result(state, (3, 0))
+
+
+class VariantTest(unittest.TestCase):
+    def test_classic_matches_tictactoe(self):
+        for board in reachable_boards().values():
+            state = CLASSIC.from_board(board)
+            self.assertEqual(CLASSIC.to_board(state), board)
+            self.assertEqual(CLASSIC.player(state), ttt.player(board))
+            self.assertEqual(CLASSIC.winner(state), ttt.winner(board))
+            self.assertEqual(CLASSIC.terminal(state), ttt.terminal(board))
+            self.assertEqual(CLASSIC.utility(state), ttt.utility(board))
+            self.assertEqual(set(CLASSIC.actions(state)), ttt.actions(board))
+            if not ttt.terminal(board):
+                mover = 0 if CLASSIC.player(state) == ttt.X else 1
+                for action in CLASSIC.actions(state):
+                    child = CLASSIC.result(state, action)
+                    self.assertEqual(CLASSIC.to_board(child), ttt.result(board, action))
+                    # Only the side that just moved can have won
+                    self.assertEqual(CLASSIC.wins_at(child[mover], action),
+                                     ttt.winner(CLASSIC.to_board(child)) is not None)
+
+
+@unittest.skipIf(ttt.np is None, "batch_evaluate needs numpy")
+class BatchTest(unittest.TestCase):
+    def test_all_boards(self):
+        boards = [[list(cells[0:3]), list(cells[3:6]), list(cells[6:9])]
+                  for cells in itertools.product((ttt.EMPTY, ttt.X, ttt.O), repeat=9)]
+        self.assertEqual(len(boards), 3 ** 9)
+        results = ttt.batch_evaluate(ttt.board_array(boards))
+        codes = {None: 0, ttt.X: 1, ttt.O: 2}
+        for n, board in enumerate(boards):
+            self.assertEqual(results["winner"][n], codes[ttt.winner(board)], board)
+            self.assertEqual(bool(results["terminal"][n]), ttt.terminal(board), board)
+            self.assertEqual(results["player"][n], codes[ttt.player(board)], board)
+            self.assertEqual({divmod(cell, 3) for cell in range(9) if results["legal"][n][cell]},
+                             ttt.actions(board), board)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,13 +3,76 @@ Tic Tac Toe Player
 """
 
 import math
+import mmap
+import os
 import threading
+import time
 import queue
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # Only batch_evaluate needs it
+    np = None
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Bound on positions kept by the memoized solver; a 3x3 game has 5,478
+# positions, 765 once symmetric boards share an entry
+SOLVER_CACHE_SIZE = 1024
+
+# Base-3 place value of each cell, first cell most significant
+_PLACE = [[3 ** (8 - (3 * i + j)) for j in range(3)] for i in range(3)]
+_CODE = {EMPTY: 0, X: 1, O: 2}
+
+# The 8 symmetries of the square, each mapping a cell (i, j) to its new place:
+# identity, three rotations, two mirrors and the two diagonal reflections
+_SYMMETRIES = [
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - j, 2 - i),
+]
+# _SYMMETRY_PLACE[t][cell] is the base-3 place value cell moves to under symmetry t
+_SYMMETRY_PLACE = [[_PLACE[f(i, j)[0]][f(i, j)[1]] for i in range(3) for j in range(3)]
+                   for f in _SYMMETRIES]
+# _SYMMETRY_ROWS[t][i][r] is what row i holding base-3 digits r adds to the key
+# of the board moved by symmetry t, so a symmetric key costs three lookups
+_SYMMETRY_ROWS = [[[sum(((r // 3 ** (2 - j)) % 3) * places[i * 3 + j] for j in range(3))
+                    for r in range(27)] for i in range(3)]
+                  for places in _SYMMETRY_PLACE]
+_INVERSE = [next(u for u, g in enumerate(_SYMMETRIES)
+                 if all(g(*f(i, j)) == (i, j) for i in range(3) for j in range(3)))
+            for f in _SYMMETRIES]
+
+# Solved table: one byte per base-3 board number, see build_book()
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.book")
+BOOK_SIZE = 3 ** 9
+BOOK_MISSING = 0xFF  # Position not reachable in a legal game
+BOOK_NO_MOVE = 9     # Terminal position
+
+_book = None
+_book_lock = threading.Lock()
+
+_search_pool = None
+_search_pool_lock = threading.Lock()
+
+# Deterministic search order: center, then corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Winning lines as row-major cell indexes (rows, columns, diagonals, the
+# order winner() checks them in) and the lines through each cell
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+_LINES_THROUGH = [[n for n, line in enumerate(LINES) if cell in line] for cell in range(9)]
+_MOVE_CELLS = tuple(i * 3 + j for i, j in MOVE_ORDER)
+
 
 def initial_state():
     """
@@ -24,6 +87,8 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
+    if isinstance(board, GameState):
+        return board.player()
 
     x_count = 0
     o_count = 0
@@ -45,6 +110,8 @@ def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
+    if isinstance(board, GameState):
+        return set(board.actions())
 
     result = set()
     for i in range(3):
@@ -55,10 +122,28 @@ def actions(board):
     return result
 
 
+def ordered_actions(board, first=()):
+    """
+    Returns the actions available on the board as a list, with any legal
+    moves from first (e.g. killer moves) at the front and the rest in
+    MOVE_ORDER.
+    """
+    ordered = [action for action in first if board[action[0]][action[1]] == EMPTY]
+    for action in MOVE_ORDER:
+        if board[action[0]][action[1]] == EMPTY and action not in ordered:
+            ordered.append(action)
+    return ordered
+
+
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
+    A GameState gives a new GameState; the one passed in is not changed.
     """
+    if isinstance(board, GameState):
+        state = board.copy()
+        state.push(action)
+        return state
 
     i, j = action
 
@@ -82,6 +167,8 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
+    if isinstance(board, GameState):
+        return board.winner
 
     # Check rows
     for i in range(3):
@@ -106,6 +193,8 @@ def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
+    if isinstance(board, GameState):
+        return board.terminal()
 
     if winner(board) is not None:
         return True
@@ -122,6 +211,8 @@ def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
+    if isinstance(board, GameState):
+        return board.utility()
 
     if winner(board) == "X":
         return 1
@@ -131,34 +222,565 @@ def utility(board):
         return 0
 
 
+class GameState:
+    """
+    A mutable board that keeps the mark counts, the count of each player's
+    marks on every line and the winner up to date as moves are made, so
+    player(), terminal() and the winner are O(1). push() makes a move in
+    place and pop() takes the last one back.
+    """
+
+    __slots__ = ("cells", "x_count", "o_count", "line_counts", "winner", "history")
+
+    def __init__(self):
+        self.cells = [EMPTY] * 9
+        self.x_count = 0
+        self.o_count = 0
+        self.line_counts = {X: [0] * 8, O: [0] * 8}
+        self.winner = None
+        self.history = []  # (cell, winner before the move) for each push
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Returns the state of a list-of-lists board.
+        """
+        state = cls()
+        for i in range(3):
+            for j in range(3):
+                symbol = board[i][j]
+                if symbol != EMPTY:
+                    state._place(i * 3 + j, symbol)
+        state.winner = winner(board)
+        return state
+
+    def to_board(self):
+        """
+        Returns the state as a list-of-lists board.
+        """
+        cells = self.cells
+        return [cells[0:3], cells[3:6], cells[6:9]]
+
+    def copy(self):
+        state = GameState.__new__(GameState)
+        state.cells = self.cells.copy()
+        state.x_count = self.x_count
+        state.o_count = self.o_count
+        state.line_counts = {X: self.line_counts[X].copy(), O: self.line_counts[O].copy()}
+        state.winner = self.winner
+        state.history = self.history.copy()
+        return state
+
+    def player(self):
+        """
+        Returns player who has the next turn.
+        """
+        return O if self.x_count > self.o_count else X
+
+    def actions(self):
+        """
+        Returns list of all possible actions (i, j), in MOVE_ORDER.
+        """
+        cells = self.cells
+        return [action for action in MOVE_ORDER if cells[action[0] * 3 + action[1]] == EMPTY]
+
+    def terminal(self):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return self.winner is not None or self.x_count + self.o_count == 9
+
+    def utility(self):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return 1 if self.winner == X else -1 if self.winner == O else 0
+
+    def _place(self, cell, symbol):
+        self.cells[cell] = symbol
+        if symbol == X:
+            self.x_count += 1
+        else:
+            self.o_count += 1
+        counts = self.line_counts[symbol]
+        for line in _LINES_THROUGH[cell]:
+            counts[line] += 1
+            if counts[line] == 3 and self.winner is None:
+                self.winner = symbol
+
+    def push(self, action):
+        """
+        Makes move (i, j) for the current player in place.
+        """
+        i, j = action
+        if i < 0 or i > 2 or j < 0 or j > 2:
+            raise ValueError("Invalid action.")
+        cell = i * 3 + j
+        if self.cells[cell] != EMPTY:
+            raise ValueError("Invalid action. Cell is not empty.")
+        self.history.append((cell, self.winner))
+        self._place(cell, self.player())
+
+    def pop(self):
+        """
+        Takes back the last move and returns it as (i, j).
+        """
+        cell, previous_winner = self.history.pop()
+        symbol = self.cells[cell]
+        self.cells[cell] = EMPTY
+        if symbol == X:
+            self.x_count -= 1
+        else:
+            self.o_count -= 1
+        counts = self.line_counts[symbol]
+        for line in _LINES_THROUGH[cell]:
+            counts[line] -= 1
+        self.winner = previous_winner
+        return divmod(cell, 3)
+
+
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
+    if isinstance(board, GameState):
+        board = board.to_board()
 
     if terminal(board):
         return None
 
+    entry = load_book()[board_key(board)]
+    if entry == BOOK_MISSING:
+        # Not reachable in a legal game (e.g. a hand-edited board), search it
+        return solve(board)[1]
+    return divmod(entry & 0x0F, 3)
+
+
+def board_key(board):
+    """
+    Returns the base-3 number of the board (EMPTY=0, X=1, O=2, top-left
+    cell most significant). Every board has its own key.
+    """
+    key = 0
+    for row in board:
+        for cell in row:
+            key = key * 3 + _CODE[cell]
+    return key
+
+
+def key_board(key):
+    """
+    Returns the board whose board_key is key.
+    """
+    cells = []
+    for _ in range(9):
+        key, code = divmod(key, 3)
+        cells.append((EMPTY, X, O)[code])
+    cells.reverse()
+    return [cells[0:3], cells[3:6], cells[6:9]]
+
+
+def transform_board(board, t):
+    """
+    Returns the board moved by symmetry t (0-7; 0 is the identity).
+    """
+    new_board = initial_state()
+    f = _SYMMETRIES[t]
+    for i in range(3):
+        for j in range(3):
+            ni, nj = f(i, j)
+            new_board[ni][nj] = board[i][j]
+    return new_board
+
+
+def transform_action(action, t):
+    """
+    Returns where action (i, j) lands under symmetry t.
+    """
+    return _SYMMETRIES[t](*action)
+
+
+def inverse_symmetry(t):
+    """
+    Returns the symmetry that undoes symmetry t.
+    """
+    return _INVERSE[t]
+
+
+def _symmetry_keys(key):
+    """
+    Returns the board_key of each of the 8 symmetric images of the board
+    with this key, in symmetry order.
+    """
+    top, rest = divmod(key, 729)
+    middle, bottom = divmod(rest, 27)
+    return [rows[0][top] + rows[1][middle] + rows[2][bottom] for rows in _SYMMETRY_ROWS]
+
+
+def canonical_key(key):
+    """
+    Returns the smallest board_key among the 8 symmetric images of the
+    board with this key. Symmetric boards share a canonical key.
+    """
+    return min(_symmetry_keys(key))
+
+
+def canonicalize(board):
+    """
+    Returns (canonical, t): the canonical image of the board and the
+    symmetry t with transform_board(board, t) == canonical. Map an action
+    found on the canonical board back with
+    transform_action(action, inverse_symmetry(t)).
+    """
+    keys = _symmetry_keys(board_key(board))
+    t = keys.index(min(keys))
+    return transform_board(board, t), t
+
+
+@lru_cache(maxsize=SOLVER_CACHE_SIZE)
+def _solved_value(key):
+    """
+    Returns the minimax value of the board with this canonical key,
+    memoized so a repeated, transposed or symmetric position is searched
+    only once.
+    """
+    board = key_board(key)
+    if terminal(board):
+        return utility(board)
+
+    code = _CODE[player(board)]
+    values = [_solved_value(canonical_key(key + code * _PLACE[i][j])) for i, j in actions(board)]
+    return max(values) if code == 1 else min(values)
+
+
+def solve(board):
+    """
+    Returns (value, action): the minimax value of the board and the first
+    optimal action in MOVE_ORDER, or None as the action on a terminal board.
+    Uses the memoized solver.
+    """
+    if terminal(board):
+        return utility(board), None
+
+    key = board_key(board)
     current_player = player(board)
+    code = _CODE[current_player]
+    best_value, best_move = None, None
+    for i, j in ordered_actions(board):
+        value = _solved_value(canonical_key(key + code * _PLACE[i][j]))
+        if best_value is None or \
+           (current_player == X and value > best_value) or \
+           (current_player == O and value < best_value):
+            best_value, best_move = value, (i, j)
+    return best_value, best_move
+
+
+def build_book():
+    """
+    Returns the solved table as a bytearray indexed by board_key. Each
+    reachable position stores (value + 1) << 4 | cell, where cell is the
+    row-major index of the best action (BOOK_NO_MOVE when terminal);
+    every other byte is BOOK_MISSING.
+    """
+    book = bytearray([BOOK_MISSING]) * BOOK_SIZE
+    stack = [initial_state()]
+    while stack:
+        board = stack.pop()
+        key = board_key(board)
+        if book[key] != BOOK_MISSING:
+            continue
+        value, action = solve(board)
+        cell = BOOK_NO_MOVE if action is None else action[0] * 3 + action[1]
+        book[key] = (value + 1) << 4 | cell
+        if action is not None:
+            stack.extend(result(board, a) for a in actions(board))
+    return book
+
+
+def load_book(path=BOOK_PATH):
+    """
+    Returns the solved table, memory-mapping it from path. The file is
+    built and saved on first use; if it cannot be saved the table is kept
+    in memory instead.
+    """
+    global _book
+    if _book is not None:
+        return _book
+    with _book_lock:
+        if _book is None:
+            try:
+                with open(path, "rb") as f:
+                    table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                if len(table) != BOOK_SIZE:
+                    table.close()
+                    raise ValueError("Solved table has the wrong size")
+            except (OSError, ValueError):
+                table = build_book()
+                try:
+                    temp_path = f"{path}.{os.getpid()}.tmp"
+                    with open(temp_path, "wb") as f:
+                        f.write(table)
+                    os.replace(temp_path, path)
+                except OSError:
+                    pass
+            _book = table
+    return _book
+
+
+def book_value(board):
+    """
+    Returns the minimax value of the board from the solved table.
+    """
+    entry = load_book()[board_key(board)]
+    if entry == BOOK_MISSING:
+        return solve(board)[0]
+    return (entry >> 4) - 1
 
-    if current_player == X:
-        v = -math.inf
-        best_move = None
-        for action in actions(board):
-            min_value = min_val(result(board, action))
-            if min_value > v:
-                v = min_value
-                best_move = action
-    else:
-        v = math.inf
-        best_move = None
-        for action in actions(board):
-            max_value = max_val(result(board, action))
-            if max_value < v:
-                v = max_value
-                best_move = action
 
-    return best_move
+def solver_cache_info():
+    """
+    Returns the hit/miss statistics of the memoized solver.
+    """
+    return _solved_value.cache_info()
+
+
+def clear_solver_cache():
+    _solved_value.cache_clear()
+
+
+def alphabeta(board):
+    """
+    Returns the optimal action for the current player on the board using
+    alpha-beta search. Picks the same action as minimax.
+    """
+    return alphabeta_search(board)[1]
+
+
+def alphabeta_search(board):
+    """
+    Returns (value, action, nodes): the minimax value of the board, the
+    first optimal action in MOVE_ORDER and the number of nodes visited.
+    """
+    if isinstance(board, GameState):
+        board = board.to_board()
+    nodes = [1]
+    if terminal(board):
+        return utility(board), None, 1
+
+    killers = {}
+    maximizing = player(board) == X
+    alpha, beta = -math.inf, math.inf
+    best_move = None
+    # The root is searched in plain MOVE_ORDER so ties break the same way as solve()
+    for action in ordered_actions(board):
+        value = _alphabeta(result(board, action), alpha, beta, 1, killers, nodes)
+        if maximizing and value > alpha:
+            alpha, best_move = value, action
+        elif not maximizing and value < beta:
+            beta, best_move = value, action
+        # Nothing beats a win
+        if (alpha if maximizing else beta) == (1 if maximizing else -1):
+            break
+    return (alpha if maximizing else beta), best_move, nodes[0]
+
+
+def _alphabeta(board, alpha, beta, depth, killers, nodes):
+    """
+    Returns the value of the board clamped to [alpha, beta]. Moves that
+    caused a cutoff are remembered per depth in killers and tried first.
+    """
+    nodes[0] += 1
+    if terminal(board):
+        return utility(board)
+
+    maximizing = player(board) == X
+    for action in ordered_actions(board, killers.get(depth, ())):
+        value = _alphabeta(result(board, action), alpha, beta, depth + 1, killers, nodes)
+        if maximizing:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            # Keep the two most recent killers at this depth
+            previous = killers.get(depth, ())
+            if action not in previous:
+                killers[depth] = (action,) + previous[:1]
+            break
+    return alpha if maximizing else beta
+
+
+class SearchTimeout(Exception):
+    """Raised inside deepening_search when the deadline passes or it is cancelled"""
+
+
+def deepening_minimax(board, budget=0.5):
+    """
+    Returns the best action found for the current player within budget
+    seconds. With enough time it is the same action as minimax.
+    """
+    return deepening_search(board, time.monotonic() + budget)[1]
+
+
+def deepening_search(board, deadline, cancelled=None):
+    """
+    Returns (value, action, depth) from an iterative deepening alpha-beta
+    search: depth 1, 2, ... until the game tree is exhausted, the deadline
+    (a time.monotonic() value) passes or cancelled (a threading.Event) is
+    set. The answer comes from the deepest finished depth; each depth tries
+    the previous best move first. Positions at the depth limit are scored
+    by heuristic(). Answers a legal move even when no depth finished.
+    """
+    if terminal(board):
+        return utility(board), None, 0
+
+    maximizing = player(board) == X
+    moves = ordered_actions(board)
+    best_value, best_move, finished = 0, moves[0], 0
+    for depth in range(1, len(moves) + 1):
+        try:
+            value, action = _deepening_root(board, ordered_actions(board, (best_move,)), depth,
+                                            maximizing, deadline, cancelled)
+        except SearchTimeout:
+            break
+        best_value, best_move, finished = value, action, depth
+        # A proven win or loss cannot change with a deeper search
+        if abs(value) == 1:
+            break
+    return best_value, best_move, finished
+
+
+def _deepening_root(board, moves, depth, maximizing, deadline, cancelled):
+    alpha, beta = -math.inf, math.inf
+    best_move = None
+    for action in moves:
+        value = _deepening_value(result(board, action), alpha, beta, depth - 1, deadline, cancelled)
+        if maximizing and value > alpha:
+            alpha, best_move = value, action
+        elif not maximizing and value < beta:
+            beta, best_move = value, action
+    return (alpha if maximizing else beta), best_move
+
+
+def _deepening_value(board, alpha, beta, depth, deadline, cancelled):
+    if time.monotonic() >= deadline or (cancelled is not None and cancelled.is_set()):
+        raise SearchTimeout()
+    if terminal(board):
+        return utility(board)
+    if depth == 0:
+        return heuristic(board)
+
+    maximizing = player(board) == X
+    for action in ordered_actions(board):
+        value = _deepening_value(result(board, action), alpha, beta, depth - 1, deadline, cancelled)
+        if maximizing:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            break
+    return alpha if maximizing else beta
+
+
+def heuristic(board):
+    """
+    Estimates a non-terminal board between -1 and 1 (exclusive): the lines
+    X can still complete minus the lines O can, weighted by marks placed.
+    """
+    score = 0
+    cells = [cell for row in board for cell in row]
+    for line in LINES:
+        marks = [cells[cell] for cell in line]
+        if O not in marks:
+            score += marks.count(X)
+        if X not in marks:
+            score -= marks.count(O)
+    # At most 8 lines with 2 marks each can be open to one side
+    return score / 17
+
+
+def inplace_minimax(board):
+    """
+    Returns the optimal action for the current player on the board, the
+    same one minimax picks, without copying the board during the search.
+    """
+    return inplace_search(board)[1]
+
+
+def inplace_search(board):
+    """
+    Returns (value, action) like solve(). The search makes and unmakes
+    moves on a single GameState (alpha-beta, MOVE_ORDER), so apart from
+    that one state it allocates nothing per node.
+    """
+    state = board.copy() if isinstance(board, GameState) else GameState.from_board(board)
+    if state.terminal():
+        return state.utility(), None
+
+    maximizing = state.player() == X
+    alpha, beta = -2, 2
+    best_cell = None
+    for cell in _MOVE_CELLS:
+        if state.cells[cell] is not EMPTY:
+            continue
+        value = _inplace_value(state, cell, alpha, beta)
+        if maximizing and value > alpha:
+            alpha, best_cell = value, cell
+        elif not maximizing and value < beta:
+            beta, best_cell = value, cell
+        # Nothing beats a win
+        if (alpha if maximizing else beta) == (1 if maximizing else -1):
+            break
+    return (alpha if maximizing else beta), divmod(best_cell, 3)
+
+
+def _inplace_value(state, cell, alpha, beta):
+    """
+    Plays the current player at cell, returns the value of the resulting
+    position searched within [alpha, beta], and takes the move back.
+    """
+    symbol = O if state.x_count > state.o_count else X
+    cells = state.cells
+    counts = state.line_counts[symbol]
+
+    # Make
+    cells[cell] = symbol
+    if symbol == X:
+        state.x_count += 1
+    else:
+        state.o_count += 1
+    won = False
+    for line in _LINES_THROUGH[cell]:
+        counts[line] += 1
+        if counts[line] == 3:
+            won = True
+
+    if won:
+        value = 1 if symbol == X else -1
+    elif state.x_count + state.o_count == 9:
+        value = 0
+    else:
+        maximizing = symbol == O
+        for child in _MOVE_CELLS:
+            if cells[child] is EMPTY:
+                child_value = _inplace_value(state, child, alpha, beta)
+                if maximizing:
+                    if child_value > alpha:
+                        alpha = child_value
+                elif child_value < beta:
+                    beta = child_value
+                if alpha >= beta:
+                    break
+        value = alpha if maximizing else beta
+
+    # Unmake
+    for line in _LINES_THROUGH[cell]:
+        counts[line] -= 1
+    if symbol == X:
+        state.x_count -= 1
+    else:
+        state.o_count -= 1
+    cells[cell] = EMPTY
+    return value
 
 
 def calc_items(board):
@@ -251,4 +873,128 @@ def threaded_minimax(board):
             best_value = value
             best_action = action
     
-    return best_action
\ No newline at end of file
+    return best_action
+
+
+def search_pool(workers=None):
+    """
+    Returns the process pool used by parallel_minimax, starting it on first
+    use. The pool is kept for later calls so worker start-up is paid once.
+    """
+    global _search_pool
+    with _search_pool_lock:
+        if _search_pool is None:
+            _search_pool = ProcessPoolExecutor(max_workers=workers)
+        return _search_pool
+
+
+def shutdown_search_pool():
+    """
+    Stops the shared search pool; the next parallel search starts a new one.
+    """
+    global _search_pool
+    with _search_pool_lock:
+        if _search_pool is not None:
+            _search_pool.shutdown()
+            _search_pool = None
+
+
+def _search_value(board):
+    """
+    Returns the minimax value of the board with a full search. Runs in a
+    pool worker, so it must stay a module-level function.
+    """
+    if terminal(board):
+        return utility(board)
+    return max_val(board) if player(board) == X else min_val(board)
+
+
+def parallel_minimax(board, executor=None, split_depth=1):
+    """
+    Returns the optimal action for the current player on the board, with
+    the search split across a process pool. split_depth=1 sends each root
+    move to a worker; split_depth=2 sends each reply to a root move, which
+    gives more and smaller tasks. Picks the same action as minimax.
+    """
+    if terminal(board):
+        return None
+
+    executor = executor or search_pool()
+    maximizing = player(board) == X
+
+    tasks = []
+    for action in ordered_actions(board):
+        child = result(board, action)
+        if split_depth < 2 or terminal(child):
+            tasks.append((action, False, [executor.submit(_search_value, child)]))
+        else:
+            replies = [executor.submit(_search_value, result(child, reply)) for reply in ordered_actions(child)]
+            tasks.append((action, True, replies))
+
+    best_value, best_move = None, None
+    for action, split, futures in tasks:
+        values = [future.result() for future in futures]
+        if not split:
+            value = values[0]
+        else:
+            # The opponent picks among the replies
+            value = min(values) if maximizing else max(values)
+        if best_value is None or (value > best_value if maximizing else value < best_value):
+            best_value, best_move = value, action
+    return best_move
+
+
+# Boards per chunk in batch_evaluate, bounding its temporary arrays
+BATCH_CHUNK = 1 << 16
+
+
+def board_array(boards):
+    """
+    Returns an (M, 9) int8 array of list-of-lists boards for batch_evaluate:
+    one row per board, cells row-major, 0 for EMPTY, 1 for X and 2 for O.
+    """
+    if np is None:
+        raise ImportError("board_array needs numpy")
+    return np.array([[_CODE[cell] for row in board for cell in row] for board in boards],
+                    dtype=np.int8).reshape(-1, 9)
+
+
+def batch_evaluate(boards):
+    """
+    Evaluates an (M, 9) int8 array of boards (see board_array) at once.
+    Returns a dict of arrays, one entry per board:
+        winner:   int8, 0 for none, 1 for X, 2 for O (same as winner())
+        terminal: bool (same as terminal())
+        player:   int8, 1 for X, 2 for O (same as player())
+        legal:    (M, 9) bool, True for empty cells
+    """
+    if np is None:
+        raise ImportError("batch_evaluate needs numpy")
+    boards = np.asarray(boards, dtype=np.int8).reshape(-1, 9)
+    count = len(boards)
+    winners = np.zeros(count, dtype=np.int8)
+    players = np.empty(count, dtype=np.int8)
+    legal = boards == 0
+
+    # Each side's cells as a 9-bit mask, so a line is a single AND and compare
+    weights = (1 << np.arange(9)).astype(np.int16)
+    line_masks = np.array([sum(1 << cell for cell in line) for line in LINES], dtype=np.int16)
+    for start in range(0, count, BATCH_CHUNK):
+        chunk = boards[start:start + BATCH_CHUNK]
+        x_marks = chunk == 1
+        o_marks = chunk == 2
+        x_bits = x_marks.astype(np.int16) @ weights
+        o_bits = o_marks.astype(np.int16) @ weights
+
+        # Walk the lines backwards so the first winning line, as in winner(), is kept
+        result = winners[start:start + BATCH_CHUNK]
+        for mask in line_masks[::-1]:
+            result[(o_bits & mask) == mask] = 2
+            result[(x_bits & mask) == mask] = 1
+
+        x_count = np.count_nonzero(x_marks, axis=1)
+        o_count = np.count_nonzero(o_marks, axis=1)
+        players[start:start + BATCH_CHUNK] = np.where(x_count > o_count, 2, 1)
+
+    terminal_flags = (winners != 0) | ~legal.any(axis=1)
+    return {"winner": winners, "terminal": terminal_flags, "player": players, "legal": legal}
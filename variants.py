@@ -0,0 +1,136 @@
+"""
+N x N, K-in-a-row board engine
+
+Generalizes the 3x3 rules in tictactoe.py to larger boards such as 4x4,
+5x5 or 15x15 gomoku. A position is a pair of bitboards (x_bits, o_bits),
+bit i * size + j standing for cell (i, j). Every run of K cells that wins
+is precomputed as a mask, so checking a position is one AND per line and
+checking a move only looks at the lines through the cell just played.
+"""
+
+import tictactoe as ttt
+
+
+class Variant:
+    """Rules for an N x N board where K marks in a row win"""
+
+    def __init__(self, size=3, k=3):
+        if not 1 <= k <= size:
+            raise ValueError("Need 1 <= k <= size.")
+        self.size = size
+        self.k = k
+        self.cells = size * size
+        self.full = (1 << self.cells) - 1
+        self.lines = self._win_lines()
+        self.lines_through = [[mask for mask in self.lines if mask >> cell & 1]
+                              for cell in range(self.cells)]
+
+    def _win_lines(self):
+        """Every horizontal, vertical and diagonal run of k cells as a bitmask"""
+        lines = []
+        for i in range(self.size):
+            for j in range(self.size):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (self.k - 1), j + dj * (self.k - 1)
+                    if 0 <= end_i < self.size and 0 <= end_j < self.size:
+                        mask = 0
+                        for step in range(self.k):
+                            mask |= 1 << ((i + di * step) * self.size + j + dj * step)
+                        lines.append(mask)
+        return lines
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return (0, 0)
+
+    def player(self, state):
+        """
+        Returns player who has the next turn.
+        """
+        x_bits, o_bits = state
+        return ttt.O if x_bits.bit_count() > o_bits.bit_count() else ttt.X
+
+    def actions(self, state):
+        """
+        Returns list of all possible actions (i, j), row by row.
+        """
+        empty = ~(state[0] | state[1]) & self.full
+        return [divmod(cell, self.size) for cell in range(self.cells) if empty >> cell & 1]
+
+    def result(self, state, action):
+        """
+        Returns the state that results from making move (i, j).
+        """
+        i, j = action
+        if not (0 <= i < self.size and 0 <= j < self.size):
+            raise ValueError("Invalid action.")
+        bit = 1 << (i * self.size + j)
+        x_bits, o_bits = state
+        if (x_bits | o_bits) & bit:
+            raise ValueError("Invalid action. Cell is not empty.")
+        if self.player(state) == ttt.X:
+            return (x_bits | bit, o_bits)
+        return (x_bits, o_bits | bit)
+
+    def wins_at(self, bits, action):
+        """
+        Returns True if bits hold a winning line through cell (i, j). After
+        a move this is the only check needed: it touches at most 4 * k lines.
+        """
+        for mask in self.lines_through[action[0] * self.size + action[1]]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def winner(self, state):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x_bits, o_bits = state
+        for mask in self.lines:
+            if x_bits & mask == mask:
+                return ttt.X
+            if o_bits & mask == mask:
+                return ttt.O
+        return None
+
+    def terminal(self, state):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return (state[0] | state[1]) == self.full or self.winner(state) is not None
+
+    def utility(self, state):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        winner = self.winner(state)
+        return 1 if winner == ttt.X else -1 if winner == ttt.O else 0
+
+    def from_board(self, board):
+        """
+        Returns the state of a list-of-lists board of X, O and EMPTY.
+        """
+        x_bits = o_bits = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == ttt.X:
+                    x_bits |= 1 << (i * self.size + j)
+                elif cell == ttt.O:
+                    o_bits |= 1 << (i * self.size + j)
+        return (x_bits, o_bits)
+
+    def to_board(self, state):
+        """
+        Returns the state as a list-of-lists board of X, O and EMPTY.
+        """
+        x_bits, o_bits = state
+        return [[ttt.X if x_bits >> (i * self.size + j) & 1 else
+                 ttt.O if o_bits >> (i * self.size + j) & 1 else ttt.EMPTY
+                 for j in range(self.size)] for i in range(self.size)]
+
+
+# The standard game
+CLASSIC = Variant(3, 3)
@@ -0,0 +1,117 @@
+"""
+Multi-process TicTacToe server
+
+One TicTacToeServer process is held to about one core by the GIL. This
+runs N worker processes that all bind the public port with SO_REUSEPORT,
+so the kernel spreads new connections over them. Each worker also listens
+on a private loopback port (private_base + worker number).
+
+Game IDs name their worker ('2-17' is game 17 on worker 2). A join or watch
+that lands on a different worker is relayed to the owner's private port.
+quick_match requests are relayed by rating bucket, so players who could
+be paired always meet on the same worker. new, new_ai and stats are
+served by whichever worker accepted the connection.
+
+    python workers.py --host 0.0.0.0 --port 8000 --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+
+from games import GameRegistry
+from server import TicTacToeServer
+
+
+class WorkerServer(TicTacToeServer):
+    def __init__(self, host, port, worker_id, workers, private_base):
+        super().__init__(host, port, reuse_port=True)
+        self.worker_id = worker_id
+        self.workers = workers
+        self.private_base = private_base
+        self.games = GameRegistry(id_prefix=f"{worker_id}-")
+        self.private_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.private_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.private_socket.bind(('127.0.0.1', private_base + worker_id))
+
+    def start(self):
+        self.private_socket.listen()
+        print(f"[WORKER {self.worker_id}] Relay port 127.0.0.1:{self.private_base + self.worker_id}")
+        threading.Thread(target=self.accept_connections, args=(self.private_socket,), daemon=True).start()
+        super().start()
+
+    def cleanup(self):
+        self.private_socket.close()
+        super().cleanup()
+
+    def owner(self, request):
+        """
+        Returns the worker that should serve this first request, or None if
+        any worker can.
+        """
+        kind, _, argument = request.partition(':')
+        if kind == 'resume':
+            # Tokens start with the game ID: <id>.<random>
+            argument = argument.partition('.')[0]
+        if kind in ('join', 'watch', 'resume'):
+            worker, sep, _ = argument.partition('-')
+            if sep and worker.isdigit() and int(worker) < self.workers:
+                return int(worker)
+            return None  # Not a worker ID; let the local worker answer game_not_found
+        if kind == 'quick_match':
+            bucket = self.matches.bucket(int(argument)) if argument.isdigit() else None
+            return hash(bucket) % self.workers if bucket is not None else 0
+        return None
+
+    def route(self, request):
+        worker = self.owner(request)
+        if worker is None or worker == self.worker_id:
+            return None
+        return ('127.0.0.1', self.private_base + worker)
+
+
+def run_worker(host, port, worker_id, workers, private_base, quiet):
+    if quiet:
+        sys.stdout = open(os.devnull, 'w')
+    WorkerServer(host, port, worker_id, workers, private_base).start()
+
+
+def start_workers(host='192.168.22.71', port=8000, workers=None, private_base=None, quiet=False):
+    """Start the worker processes and return them"""
+    workers = workers or os.cpu_count() or 1
+    private_base = private_base or port + 1
+    processes = []
+    for worker_id in range(workers):
+        process = multiprocessing.Process(target=run_worker, name=f"worker-{worker_id}",
+                                          args=(host, port, worker_id, workers, private_base, quiet),
+                                          daemon=True)
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='192.168.22.71')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes (default: one per core)")
+    parser.add_argument('--private-base', type=int, help="first private relay port (default: port + 1)")
+    parser.add_argument('--quiet', action='store_true', help="silence the per-move logging")
+    args = parser.parse_args()
+
+    print(f"[SERVER] Starting {args.workers} workers on {args.host}:{args.port}")
+    processes = start_workers(args.host, args.port, args.workers, args.private_base, args.quiet)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        print("[SERVER] Shutting down workers...")
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()